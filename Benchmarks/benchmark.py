@@ -0,0 +1,302 @@
+#!/usr/bin/python3
+"""Benchmarks construction time, peak RSS and value get/set throughput of
+every bszgw widget at several scales, writing the results as JSON.
+
+Each case runs in its own process so peak RSS isn't polluted by the previous
+ones. Without a display it runs itself under xvfb-run, or under the Broadway
+GDK backend with --backend broadway.
+
+usage: benchmark.py [--output FILE] [--compare OLD_FILE]
+                    [--backend auto|xvfb|broadway] [--counts N ...]
+                    [--cases NAME ...]"""
+import argparse
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import time
+
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+COUNTS = [10, 1000, 10000]
+ITEMS = [f"Choice {n}" for n in range(10)]
+DICT = {item: item.lower().replace(" ", "_") for item in ITEMS}
+IDS = list(DICT.values())
+
+
+def cases(bszgw):
+    """name -> (build(n), values(n) or None if it has no value)"""
+    widget_cases = {
+        "Button": (
+            lambda n: bszgw.Button("Button", lambda *args: None),
+            None,
+        ),
+        "CheckButton": (
+            lambda n: bszgw.CheckButton("Check Button", n % 2 == 0),
+            lambda n: n % 2 == 0,
+        ),
+        "ComboBox.new": (
+            lambda n: bszgw.ComboBox.new(ITEMS, n % len(ITEMS)),
+            lambda n: n % len(ITEMS),
+        ),
+        "ComboBox.new_dict": (
+            lambda n: bszgw.ComboBox.new_dict(DICT, IDS[n % len(IDS)]),
+            lambda n: IDS[n % len(IDS)],
+        ),
+        "ComboBox.new_lazy": (
+            lambda n: bszgw.ComboBox.new_lazy(DICT, IDS[n % len(IDS)]),
+            lambda n: IDS[n % len(IDS)],
+        ),
+        "Entry": (
+            lambda n: bszgw.Entry(f"Text {n}", label="Entry"),
+            lambda n: f"Text {n}",
+        ),
+        "Entry multi_line": (
+            lambda n: bszgw.Entry(f"Text\n{n}", label="Entry",
+                                  multi_line=True),
+            lambda n: f"Text\n{n}",
+        ),
+        "RadioButtons": (
+            lambda n: bszgw.RadioButtons(ITEMS[:3], n % 3, label="Radio"),
+            lambda n: n % 3,
+        ),
+        "SpinScale.new": (
+            lambda n: bszgw.SpinScale.new(n % 100, 0, 100, 1, 10,
+                                          label="SpinScale"),
+            lambda n: n % 100,
+        ),
+        "SpinScale.new logarithmic": (
+            lambda n: bszgw.SpinScale.new(n % 100 + 1, 1, 1000, 1, 10,
+                                          label="SpinScale", digits=2,
+                                          logarithmic=True),
+            lambda n: n % 100 + 1.5,
+        ),
+    }
+
+    # Image and Plot need numpy and pycairo
+    numpy = bszgw.numpy
+    if numpy is not None:
+        image = numpy.zeros((256, 256, 3), numpy.uint8)
+        images = [image, numpy.full_like(image, 255)]
+        series = numpy.sin(numpy.arange(4096) / 64)
+        widget_cases["Image"] = (
+            lambda n: bszgw.Image(images[n % 2], label="Image"),
+            lambda n: images[n % 2],
+        )
+        widget_cases["Plot"] = (
+            lambda n: bszgw.Plot(series, label="Plot"),
+            lambda n: series[n % 2:],
+        )
+    return widget_cases
+
+
+def layouts(bszgw, Gtk):
+    """name -> build(count), for containers measured as a whole"""
+    def tree(labels):
+        # three sub-lists per level, flipping orientation each time
+        if len(labels) <= 3:
+            return [Gtk.Label.new(label) for label in labels]
+        third = -(-len(labels) // 3)
+        return [tree(labels[n:n + third])
+                for n in range(0, len(labels), third)]
+
+    def nested(count):
+        return bszgw.AutoBox(tree([str(n) for n in range(count)]))
+
+    def grid(count):
+        grid = bszgw.Grid()
+        grid.attach_all_down(*(
+            bszgw.GridChild(Gtk.Label.new(str(n)), width=1 + n % 2)
+            for n in range(count)
+        ))
+        return grid
+
+    def table(count):
+        # a hundred rows per widget, so a million at 10k
+        rows = count * 100
+        table = bszgw.Table({"row": range(rows),
+                             "text": [str(n) for n in range(rows)]})
+        table.sort("row", descending=True)
+        return table
+
+    def page():
+        return bszgw.AutoBox([
+            bszgw.SpinScale.new(50, 0, 100, 1, 10, label="SpinScale"),
+            bszgw.Entry("Text", label="Entry"),
+        ])
+
+    def notebook(count):
+        # only the first page is built
+        notebook = bszgw.LazyNotebook(
+            {f"Page {n}": page for n in range(count)}
+        )
+        notebook.build("Page 0")
+        return notebook
+
+    def messages(count):
+        # queues them all, then closes each in turn, so every one after the
+        # first reuses the pooled dialog
+        futures = [bszgw.MessageAsync(f"Message {n}", coalesce=False)
+                   for n in range(count)]
+        for _ in range(count):
+            next(window for window in Gtk.Window.list_toplevels()
+                 if isinstance(window, Gtk.MessageDialog)
+                 and window.get_visible()).response(-1)
+        return futures
+
+    return {"AutoBox nesting": nested, "Grid.attach_all": grid,
+            "Table": table, "LazyNotebook": notebook,
+            "MessageAsync": messages}
+
+
+def peak_rss() -> int:
+    """Peak resident set size of this process in KiB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # bytes on macOS, KiB everywhere else
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def run_case(name: str, count: int) -> dict:
+    import gi
+    gi.require_version("Gtk", "3.0")
+    from gi.repository import Gtk
+    sys.path.insert(0, os.path.dirname(HERE))
+    import bszgw
+
+    result = {"case": name, "count": count}
+    widget_cases = cases(bszgw)
+    baseline = peak_rss()
+
+    if name in widget_cases:
+        build, values = widget_cases[name]
+        start = time.perf_counter()
+        widgets = [build(n) for n in range(count)]
+        elapsed = time.perf_counter() - start
+
+        if values is not None:
+            new = [values(n + 1) for n in range(count)]
+            start = time.perf_counter()
+            for widget in widgets:
+                widget.value
+            result["get_per_s"] = count / (time.perf_counter() - start)
+
+            start = time.perf_counter()
+            for widget, value in zip(widgets, new):
+                widget.value = value
+            result["set_per_s"] = count / (time.perf_counter() - start)
+    else:
+        build = layouts(bszgw, Gtk)[name]
+        start = time.perf_counter()
+        build(count)
+        elapsed = time.perf_counter() - start
+
+    result["construct_s"] = elapsed
+    result["construct_us_each"] = elapsed / count * 1e6
+    result["peak_rss_kib"] = peak_rss()
+    result["rss_growth_kib"] = result["peak_rss_kib"] - baseline
+    return result
+
+
+def headless_env(backend: str) -> (dict, list, subprocess.Popen):
+    """Returns the environment and command prefix for child processes,
+plus a broadwayd process to stop afterwards, if one was started."""
+    env = dict(os.environ)
+    has_display = env.get("DISPLAY") or env.get("WAYLAND_DISPLAY")
+    if backend == "auto":
+        if has_display:
+            return env, [], None
+        backend = "xvfb" if shutil.which("xvfb-run") else "broadway"
+
+    if backend == "xvfb":
+        return env, ["xvfb-run", "-a"], None
+
+    display = ":94"
+    broadwayd = subprocess.Popen(["broadwayd", display],
+                                 stdout=subprocess.DEVNULL,
+                                 stderr=subprocess.DEVNULL)
+    time.sleep(0.5)
+    env["GDK_BACKEND"] = "broadway"
+    env["BROADWAY_DISPLAY"] = display
+    return env, [], broadwayd
+
+
+def compare(old: dict, new: dict):
+    """Prints the change in every shared measurement, new vs old."""
+    before = {(r["case"], r["count"]): r for r in old["results"]}
+    for result in new["results"]:
+        key = (result["case"], result["count"])
+        if key not in before:
+            continue
+        changes = []
+        for field in ("construct_s", "get_per_s", "set_per_s",
+                      "rss_growth_kib"):
+            if before[key].get(field) and field in result:
+                ratio = result[field] / before[key][field]
+                changes.append(f"{field} x{ratio:.2f}")
+        print(f"{key[0]:<28}{key[1]:>7}  " + "  ".join(changes))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--output", default="bench_output.json")
+    parser.add_argument("--compare")
+    parser.add_argument("--backend", default="auto",
+                        choices=("auto", "xvfb", "broadway"))
+    parser.add_argument("--counts", type=int, nargs="+", default=COUNTS)
+    parser.add_argument("--cases", nargs="+")
+    # internal, runs a single case and prints its result
+    parser.add_argument("--case", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.case:
+        print(json.dumps(run_case(args.case, args.counts[0])))
+        return
+
+    names = args.cases or [
+        "Button", "CheckButton", "ComboBox.new", "ComboBox.new_dict",
+        "ComboBox.new_lazy", "Entry", "Entry multi_line", "RadioButtons",
+        "SpinScale.new", "SpinScale.new logarithmic", "Image", "Plot",
+        "AutoBox nesting", "Grid.attach_all", "Table", "LazyNotebook",
+        "MessageAsync",
+    ]
+    env, prefix, broadwayd = headless_env(args.backend)
+    results = []
+    try:
+        for name in names:
+            for count in args.counts:
+                output = subprocess.run(
+                    prefix + [sys.executable, os.path.abspath(__file__),
+                              "--case", name, "--counts", str(count)],
+                    env=env, check=True, stdout=subprocess.PIPE, text=True,
+                ).stdout
+                result = json.loads(output.strip().splitlines()[-1])
+                results.append(result)
+                print(f"{name:<28}{count:>7}  "
+                      f"{result['construct_us_each']:>10.1f} us each  "
+                      f"{result['rss_growth_kib']:>8} KiB", file=sys.stderr)
+    finally:
+        if broadwayd is not None:
+            broadwayd.terminate()
+
+    report = {
+        "meta": {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "backend": args.backend,
+        },
+        "results": results,
+    }
+    with open(args.output, "w") as file:
+        json.dump(report, file, indent=1)
+
+    if args.compare:
+        with open(args.compare) as file:
+            compare(json.load(file), report)
+
+
+if __name__ == "__main__":
+    main()
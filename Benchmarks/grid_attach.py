@@ -0,0 +1,70 @@
+#!/usr/bin/python3
+"""Compares bszgw.Grid.attach_all against the per-cell get_child_at probing it
+used to do. The old probing ignores spans, so in the spanned cases it overlaps
+children instead of avoiding them; the timing is what's being compared.
+Needs a display, so run it through xvfb-run when headless.
+
+usage: grid_attach.py [count ...]"""
+import os
+import sys
+import time
+import gi
+gi.require_version("Gtk", "3.0")
+from gi.repository import Gtk
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+import bszgw
+
+
+def probing_attach_all(grid, direction, *children,
+                       column=0, row=0, base_width=1, base_height=1):
+    """The old attach_all. Only checks the top-left cell of each child."""
+    for child in children:
+        if isinstance(child, Gtk.Widget):
+            child = bszgw.GridChild(child)
+        width = base_width if child.width is None else child.width
+        height = base_height if child.height is None else child.height
+        left = column + child.col_off
+        top = row + child.row_off
+        while grid.get_child_at(left, top):
+            if direction == Gtk.DirectionType.DOWN:
+                top += 1
+            elif direction == Gtk.DirectionType.RIGHT:
+                left += 1
+            elif direction == Gtk.DirectionType.UP:
+                top -= 1
+            elif direction == Gtk.DirectionType.LEFT:
+                left -= 1
+        grid.attach(child.widget, left, top, width, height)
+
+
+def children(count, width, height):
+    return [bszgw.GridChild(Gtk.Label.new(str(n)), width=width, height=height)
+            for n in range(count)]
+
+
+def bench(attach_all, grid, direction, count, width, height):
+    kids = children(count, width, height)
+    start = time.perf_counter()
+    attach_all(grid, direction, *kids)
+    return time.perf_counter() - start
+
+
+CASES = [
+    # name, direction, width, height
+    ("column", Gtk.DirectionType.DOWN, 1, 1),
+    ("row", Gtk.DirectionType.RIGHT, 1, 1),
+    ("spanned column", Gtk.DirectionType.DOWN, 2, 2),
+    ("spanned row", Gtk.DirectionType.RIGHT, 2, 2),
+]
+
+
+if __name__ == "__main__":
+    counts = [int(x) for x in sys.argv[1:]] or [100, 500, 2000]
+    print(f"{'case':<16}{'count':>8}{'probing':>12}{'bszgw':>12}")
+    for name, direction, width, height in CASES:
+        for count in counts:
+            old = bench(probing_attach_all, Gtk.Grid(),
+                        direction, count, width, height)
+            new = bench(bszgw.Grid.attach_all, bszgw.Grid(),
+                        direction, count, width, height)
+            print(f"{name:<16}{count:>8}{old:>11.4f}s{new:>11.4f}s")
@@ -10,7 +10,7 @@ Brief overview:
  - Data-entry widgets have many extra features courtesy of the DataWidget mixin
    - `value` property
    - `reset` method
-   - `connect_changed` method
+   - `connect_changed` method, optionally debounced or throttled
  - Labels for everything
  - Widgets are created more 'artistically'
    - The 'new()' method, if present, will create a fully functional widget
@@ -22,9 +22,34 @@ import gi
 gi.require_version("Gtk", "3.0")
 from gi.repository import Gtk
 gi.require_version("Gdk", "3.0")
-from gi.repository import Gdk  # noqa: F401
+from gi.repository import Gdk
 from gi.repository import GObject
+from gi.repository import GLib
+import asyncio
+import atexit
+import bisect
+import collections
+import collections.abc
+import concurrent.futures
+import copy
+import functools
+import hashlib
+import json
 import math
+import os
+import selectors
+import sys
+import time
+import types
+import weakref
+try:
+    import cairo
+except ImportError:
+    cairo = None
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 
 # TODO:
@@ -32,6 +57,426 @@ import math
 # using the mixin.
 
 
+# ### HELPERS ### #
+
+
+class Coalescer():
+    # {{{
+    """Callable that collapses bursts of calls into fewer calls of function,
+scheduled on the GLib main loop. Only the most recent call's arguments are
+passed on. Used by DataWidget.connect_changed.
+
+debounce: ms. Run once calls have stopped for this long.
+throttle: ms. Run at most once per interval. A call after a quiet interval
+runs immediately, the last call inside an interval runs at its end.
+With neither, runs once the main loop is idle, so at most once per frame.
+
+calls: how many times function actually ran.
+coalesced: how many calls were dropped in favor of a later one."""
+    def __init__(self, function: callable,
+                 debounce: int = 0, throttle: int = 0):
+        self.function = function
+        self.debounce = debounce
+        self.throttle = throttle
+        self.calls = 0
+        self.coalesced = 0
+        self.__args = None
+        self.__source = None
+        self.__last = -math.inf
+
+    def __call__(self, *args):
+        if self.__args is not None:
+            self.coalesced += 1
+        self.__args = args
+
+        if self.debounce:
+            if self.__source is not None:
+                GLib.source_remove(self.__source)
+            self.__source = GLib.timeout_add(self.debounce, self.__run)
+        elif self.__source is not None:
+            return
+        elif self.throttle:
+            wait = self.__last + self.throttle - time.monotonic() * 1000
+            if wait > 0:
+                self.__source = GLib.timeout_add(math.ceil(wait), self.__run)
+            else:
+                self.__run()
+        else:
+            self.__source = GLib.idle_add(self.__run)
+
+    def __run(self) -> bool:
+        self.__source = None
+        args, self.__args = self.__args, None
+        self.__last = time.monotonic() * 1000
+        self.calls += 1
+        self.function(*args)
+        return False
+
+    @property
+    def pending(self) -> bool:
+        return self.__args is not None
+
+    def cancel(self):
+        """Drops the pending call, if any."""
+        if self.__source is not None:
+            GLib.source_remove(self.__source)
+            self.__source = None
+        self.__args = None
+    # }}}
+
+
+_thread_pool = None
+
+
+def thread_pool() -> concurrent.futures.ThreadPoolExecutor:
+    """Returns a ThreadPoolExecutor shared by everything that asks for it,
+created on first use. Handy as the executor for Button and connect_changed."""
+    global _thread_pool
+    if _thread_pool is None:
+        _thread_pool = concurrent.futures.ThreadPoolExecutor(
+            thread_name_prefix="bszgw"
+        )
+    return _thread_pool
+
+
+class Worker():
+    # {{{
+    """Callable that runs function in a concurrent.futures executor instead
+of on the GTK main loop, then hands the outcome back on the main loop through
+GLib.idle_add. Used by Button and DataWidget.connect_changed when given an
+executor.
+
+function must not touch GTK. With a process pool, it and its arguments must
+also be picklable.
+done: called on the main loop with function's return value.
+error: called on the main loop with the exception function raised.
+If not given, the exception is raised on the main loop instead.
+busy: called with True when a job starts and False once none are left.
+policy: what calling again while a job runs does.
+  "disable" - nothing, the call is ignored.
+  "cancel" - starts a new job. The old one's outcome is thrown away, and it's
+             cancelled outright if it hasn't started yet.
+  "coalesce" - runs once more after the current job, with the latest args."""
+    POLICIES = ("disable", "cancel", "coalesce")
+
+    def __init__(self, function: callable,
+                 executor: concurrent.futures.Executor,
+                 done: callable = None, error: callable = None,
+                 busy: callable = None, policy: str = "disable"):
+        if policy not in self.POLICIES:
+            raise ValueError(f"Policy {policy} not one of {self.POLICIES}")
+        self.function = function
+        self.executor = executor
+        self.done = done
+        self.error = error
+        self.busy = busy
+        self.policy = policy
+        self.__future = None
+        self.__queued = None
+
+    def __call__(self, *args):
+        if self.__future is not None:
+            if self.policy == "disable":
+                return
+            elif self.policy == "coalesce":
+                self.__queued = args
+                return
+            self.__future.cancel()
+        elif self.busy:
+            self.busy(True)
+        self.__submit(args)
+
+    def __submit(self, args):
+        self.__future = self.executor.submit(self.function, *args)
+        # done callbacks run on the worker thread, idle_add is thread-safe
+        self.__future.add_done_callback(
+            lambda future: GLib.idle_add(self.__finish, future)
+        )
+
+    def __finish(self, future: concurrent.futures.Future) -> bool:
+        if future is not self.__future:
+            # cancelled or replaced
+            return False
+
+        if self.__queued is not None:
+            args, self.__queued = self.__queued, None
+            self.__submit(args)
+        else:
+            self.__future = None
+            if self.busy:
+                self.busy(False)
+
+        if future.cancelled():
+            return False
+        exception = future.exception()
+        if exception is None:
+            if self.done:
+                self.done(future.result())
+        elif self.error:
+            self.error(exception)
+        else:
+            raise exception
+        return False
+
+    @property
+    def running(self) -> bool:
+        return self.__future is not None
+
+    def cancel(self):
+        """Forgets the current job and any queued call.
+A job that already started keeps running, but its outcome is ignored."""
+        self.__queued = None
+        if self.__future is not None:
+            self.__future.cancel()
+            self.__future = None
+            if self.busy:
+                self.busy(False)
+    # }}}
+
+
+_event_loop = None
+_coroutine_tasks = set()
+# GLib sources stepping _event_loop: "fd" watches its selector, "timer" is
+# its next timer, "idle" runs callbacks scheduled from outside the loop
+_loop_sources = {}
+
+
+class _GLibSelector(selectors.DefaultSelector):
+    """Selector that doesn't block while the GLib main loop is stepping the
+asyncio loop. Once asyncio has nothing ready and would wait, it stops the
+loop and keeps the timeout asyncio asked for, so GLib can do the waiting."""
+    def __init__(self):
+        super().__init__()
+        self.loop = None
+        self.stepping = False
+        self.timeout = None
+
+    def select(self, timeout: float = None):
+        if not self.stepping:
+            return super().select(timeout)
+        events = super().select(0)
+        if timeout != 0 and not events:
+            self.timeout = timeout
+            self.loop.stop()
+        return events
+
+
+class _GLibEventLoop(asyncio.SelectorEventLoop):
+    """asyncio loop that asks GLib for a step whenever a callback or timer
+is scheduled from outside it, like a future resolved by a GTK handler."""
+    def __init__(self):
+        self.selector = _GLibSelector()
+        super().__init__(self.selector)
+        self.selector.loop = self
+
+    def call_soon(self, *args, **kwargs) -> asyncio.Handle:
+        handle = super().call_soon(*args, **kwargs)
+        _wake()
+        return handle
+
+    def call_at(self, *args, **kwargs) -> asyncio.TimerHandle:
+        handle = super().call_at(*args, **kwargs)
+        _wake()
+        return handle
+
+
+def event_loop() -> asyncio.AbstractEventLoop:
+    """Returns the asyncio event loop coroutines are run on, created on first
+use. It has no thread of its own. The GLib main loop runs it whenever its
+file descriptors are ready, a timer is due or a callback is scheduled, so
+coroutines run on the GTK thread and can use widgets directly.
+Watching file descriptors needs GLib.unix_fd_add_full, so Unix."""
+    global _event_loop
+    if _event_loop is None:
+        _event_loop = _GLibEventLoop()
+    return _event_loop
+
+
+def _wake():
+    loop = _event_loop
+    if loop is None or loop.is_running() or "idle" in _loop_sources:
+        return
+    _loop_sources["idle"] = GLib.idle_add(_on_idle,
+                                          priority=GLib.PRIORITY_DEFAULT)
+
+
+def _step():
+    """Runs event_loop() until it would wait, then hands the waiting to
+GLib: a watch on the selector's fd and a timeout for the next timer."""
+    loop = event_loop()
+    # a coroutine is sitting in a nested main loop, like Message()'s.
+    # The outer step carries on once it returns.
+    if loop.is_running():
+        return
+    loop.selector.stepping = True
+    loop.selector.timeout = None
+    try:
+        loop.run_forever()
+    finally:
+        loop.selector.stepping = False
+
+    timer = _loop_sources.pop("timer", None)
+    if timer is not None:
+        GLib.source_remove(timer)
+    if loop.selector.timeout is not None:
+        _loop_sources["timer"] = GLib.timeout_add(
+            math.ceil(loop.selector.timeout * 1000), _on_timer
+        )
+    if "fd" not in _loop_sources and hasattr(GLib, "unix_fd_add_full"):
+        _loop_sources["fd"] = GLib.unix_fd_add_full(
+            GLib.PRIORITY_DEFAULT, loop.selector.fileno(),
+            GLib.IOCondition.IN, _on_fd
+        )
+
+
+def _on_idle() -> bool:
+    del _loop_sources["idle"]
+    _step()
+    return False
+
+
+def _on_timer() -> bool:
+    del _loop_sources["timer"]
+    _step()
+    return False
+
+
+def _on_fd(fd: int, condition: GLib.IOCondition) -> bool:
+    if event_loop().is_running():
+        # nested, stop watching so a ready fd doesn't spin the inner loop.
+        # The outer step adds the watch back.
+        del _loop_sources["fd"]
+        return False
+    _step()
+    return True
+
+
+def run_coroutine(coroutine) -> asyncio.Task:
+    """Schedules a coroutine on event_loop() and returns its Task.
+Tasks still running when an App is destroyed are cancelled."""
+    task = event_loop().create_task(coroutine)
+    _coroutine_tasks.add(task)
+    task.add_done_callback(_coroutine_tasks.discard)
+    return task
+
+
+def cancel_coroutines():
+    """Cancels every task started by run_coroutine."""
+    for task in list(_coroutine_tasks):
+        task.cancel()
+
+
+def coroutine_handler(function: callable) -> callable:
+    """Returns function unchanged, or if it's an async def function, a
+regular function that starts it with run_coroutine when called.
+This is how Button, connect_changed and App.launch accept coroutines."""
+    if not asyncio.iscoroutinefunction(function):
+        return function
+
+    @functools.wraps(function)
+    def handler(*args):
+        return run_coroutine(function(*args))
+    return handler
+
+
+class Profiler():
+    # {{{
+    """Records how long signal handlers block the main loop.
+Made by profile(). Only handlers connected while profiling is on are timed,
+everything else runs untouched, so there's no cost while it's off.
+
+Calls are grouped by (widget, signal, handler) into log2 histograms of
+microseconds, along with count, total and max seconds.
+budget: seconds. Calls longer than this are counted as slow, and reported
+on stderr as they happen if warn."""
+    def __init__(self, budget: float = 1 / 60, warn: bool = True):
+        self.budget = budget
+        self.warn = warn
+        self.stats = {}
+
+    def wrap(self, function: callable, widget: GObject.Object,
+             signal: str) -> callable:
+        """Returns function timed under widget and signal."""
+        key = (f"{type(widget).__name__} {id(widget):#x}", signal,
+               getattr(function, "__qualname__", repr(function)))
+
+        @functools.wraps(function)
+        def timed(*args):
+            start = time.perf_counter()
+            try:
+                return function(*args)
+            finally:
+                self.record(key, time.perf_counter() - start)
+        return timed
+
+    def record(self, key: (str, str, str), seconds: float):
+        stat = self.stats.get(key)
+        if stat is None:
+            stat = self.stats[key] = {"count": 0, "total": 0.0, "max": 0.0,
+                                      "slow": 0, "histogram": [0] * 32}
+        stat["count"] += 1
+        stat["total"] += seconds
+        stat["max"] = max(stat["max"], seconds)
+        # bucket n holds calls under 2**n us
+        stat["histogram"][min(int(seconds * 1e6).bit_length(), 31)] += 1
+        if seconds > self.budget:
+            stat["slow"] += 1
+            if self.warn:
+                print(f"bszgw: {key[2]} on {key[0]} {key[1]} blocked the "
+                      f"main loop for {seconds * 1000:.1f}ms",
+                      file=sys.stderr)
+
+    def snapshot(self) -> {(str, str, str): dict}:
+        """Returns a copy of the stats, keyed by (widget, signal, handler).
+Histograms are {"<Nus": count} without the empty buckets."""
+        return {key: dict(stat, histogram={
+                    f"<{2 ** n}us": count
+                    for n, count in enumerate(stat["histogram"]) if count
+                }) for key, stat in self.stats.items()}
+
+    def dump(self, file=None):
+        """Prints the stats, slowest total first, to file or stderr."""
+        file = sys.stderr if file is None else file
+        print(f"{'total ms':>10}{'max ms':>10}{'calls':>8}{'slow':>6}  "
+              "handler", file=file)
+        for key, stat in sorted(self.stats.items(),
+                                key=lambda item: -item[1]["total"]):
+            print(f"{stat['total'] * 1000:>10.1f}{stat['max'] * 1000:>10.1f}"
+                  f"{stat['count']:>8}{stat['slow']:>6}  "
+                  f"{key[2]} on {key[0]} {key[1]}", file=file)
+    # }}}
+
+
+_profiler = None
+
+
+def profile(enable: bool = True, budget: float = 1 / 60, warn: bool = True,
+            dump: bool = False) -> Profiler:
+    """Starts timing connect_changed and Button handlers, plus App.launch
+prelaunch callables, connected from now on. Returns the Profiler.
+dump: print the stats when the program exits.
+profile(False) stops timing handlers connected afterwards.
+Setting the BSZGW_PROFILE environment variable does profile(dump=True)"""
+    global _profiler
+    if not enable:
+        _profiler = None
+        return None
+    _profiler = Profiler(budget, warn)
+    if dump:
+        atexit.register(_profiler.dump)
+    return _profiler
+
+
+if os.environ.get("BSZGW_PROFILE"):
+    profile(dump=True)
+
+
+def _timed(function: callable, widget: GObject.Object,
+           signal: str) -> callable:
+    return function if _profiler is None else \
+        _profiler.wrap(function, widget, signal)
+
+
 # ### MIX-INS ### #
 
 
@@ -47,11 +492,62 @@ Also sets reset_value used in reset()"""
         self.reset_value = value
         self.value_widget = widget
         self.value_signal = signal
-
-    def connect_changed(self, function: callable, *args):
-        """Connects to the widget's value change signal."""
-        self.value_widget.connect(self.value_signal, function,
-                                  *args if args else ())
+        self.changed_handlers = {}
+        self.__workers = {}
+
+    def connect_changed(self, function: callable, *args,
+                        debounce: int = 0, throttle: int = 0,
+                        latest: bool = False,
+                        executor: concurrent.futures.Executor = None,
+                        done: callable = None, error: callable = None,
+                        policy: str = "coalesce") -> int:
+        """Connects to the widget's value change signal.
+Returns the handler ID, also the key of the function in changed_handlers.
+
+For widgets that change rapidly, like a dragged SpinScale, function can be
+wrapped in a Coalescer so it only sees the most recent change:
+debounce: ms. Run once changes have stopped for this long.
+throttle: ms. Run at most once per interval.
+latest: run once the main loop is idle, so at most once per frame.
+The Coalescer's coalesced count says how many changes were skipped.
+
+If executor is given, function runs there through a Worker as
+function(value, *args), value being read on the main loop when the change
+happens. done, error and policy are passed on to the Worker.
+Otherwise function may be an async def function, see run_coroutine()"""
+        worker = None
+        if executor is not None:
+            worker = Worker(function, executor, done, error, policy=policy)
+            function = functools.partial(self.__run_worker, worker, args)
+            args = ()
+        else:
+            function = coroutine_handler(function)
+        function = _timed(function, self, self.value_signal)
+        if debounce or throttle or latest:
+            function = Coalescer(function, debounce, throttle)
+        handler = self.value_widget.connect(self.value_signal, function,
+                                            *args if args else ())
+        self.changed_handlers[handler] = function
+        if worker is not None:
+            self.__workers[handler] = worker
+        return handler
+
+    def disconnect_changed(self, handler: int = None):
+        """Disconnects a handler made by connect_changed, or all of them if
+handler is None. Their pending Coalescer calls and Worker jobs are dropped."""
+        handlers = list(self.changed_handlers) if handler is None \
+            else [handler]
+        for handler in handlers:
+            function = self.changed_handlers.pop(handler)
+            self.value_widget.disconnect(handler)
+            if isinstance(function, Coalescer):
+                function.cancel()
+            worker = self.__workers.pop(handler, None)
+            if worker is not None:
+                worker.cancel()
+
+    def __run_worker(self, worker: Worker, args: tuple, *signal_args):
+        worker(self.value, *args)
 
     def reset(self):
         self.value = self.reset_value
@@ -67,6 +563,256 @@ Also sets reset_value used in reset()"""
     # }}}
 
 
+# ### MODELS ### #
+
+
+class SequenceModel(GObject.Object, Gtk.TreeModel):
+    # {{{
+    """Read-only list Gtk.TreeModel over Python sequences.
+Every column is a sequence, and row n is every column's nth item, produced
+as text only when GTK asks for it. Nothing is copied into a Gtk.ListStore,
+so it's cheap to build for huge lists that already live in Python.
+Columns must all be the same length and not change size while in use.
+
+rows, if not None, is a sequence of column indices to show instead, in its
+order, like a sort permutation, the rows left after filtering or a window of
+either. Changing it emits no signals, so either do it while the model isn't
+attached to a view or emit the row signals for it, like Table does."""
+    def __init__(self, *columns: [collections.abc.Sequence]):
+        assert columns
+        super().__init__()
+        self.columns = columns
+        self.rows = None
+
+    def __len__(self) -> int:
+        return len(self.columns[0] if self.rows is None else self.rows)
+
+    def __iter_at(self, index: int) -> Gtk.TreeIter:
+        tree_iter = Gtk.TreeIter()
+        tree_iter.user_data = index
+        return tree_iter
+
+    def __index(self, tree_iter: Gtk.TreeIter) -> int:
+        # an index of 0 reads back as a NULL pointer.
+        return tree_iter.user_data or 0
+
+    def append(self, row: [object]):
+        """Adds a row at the end. Only works if every column is a list
+and rows is None."""
+        assert self.rows is None
+        if len(row) != len(self.columns):
+            raise ValueError(f"Row has {len(row)} values, "
+                             f"model has {len(self.columns)} columns")
+        for column, value in zip(self.columns, row):
+            column.append(value)
+        index = len(self.columns[0]) - 1
+        self.row_inserted(Gtk.TreePath.new_from_indices([index]),
+                          self.__iter_at(index))
+
+    def do_get_flags(self) -> Gtk.TreeModelFlags:
+        return Gtk.TreeModelFlags.LIST_ONLY | Gtk.TreeModelFlags.ITERS_PERSIST
+
+    def do_get_n_columns(self) -> int:
+        return len(self.columns)
+
+    def do_get_column_type(self, column: int) -> GObject.GType:
+        return GObject.TYPE_STRING
+
+    def do_get_iter(self, path: Gtk.TreePath) -> (bool, Gtk.TreeIter):
+        indices = path.get_indices()
+        if len(indices) == 1 and 0 <= indices[0] < len(self):
+            return (True, self.__iter_at(indices[0]))
+        return (False, None)
+
+    def do_get_path(self, tree_iter: Gtk.TreeIter) -> Gtk.TreePath:
+        return Gtk.TreePath.new_from_indices([self.__index(tree_iter)])
+
+    def do_get_value(self, tree_iter: Gtk.TreeIter, column: int) -> str:
+        index = self.__index(tree_iter)
+        if self.rows is not None:
+            index = self.rows[index]
+        value = self.columns[column][index]
+        return None if value is None else str(value)
+
+    # tree_iter is an in-parameter here, moved in place
+    def do_iter_next(self, tree_iter: Gtk.TreeIter) -> bool:
+        index = self.__index(tree_iter) + 1
+        if index < len(self):
+            tree_iter.user_data = index
+            return True
+        return False
+
+    def do_iter_previous(self, tree_iter: Gtk.TreeIter) -> bool:
+        index = self.__index(tree_iter) - 1
+        if index >= 0:
+            tree_iter.user_data = index
+            return True
+        return False
+
+    def do_iter_has_child(self, tree_iter: Gtk.TreeIter) -> bool:
+        return False
+
+    def do_iter_n_children(self, tree_iter: Gtk.TreeIter) -> int:
+        return len(self) if tree_iter is None else 0
+
+    def do_iter_nth_child(self, parent: Gtk.TreeIter,
+                          n: int) -> (bool, Gtk.TreeIter):
+        if parent is None and 0 <= n < len(self):
+            return (True, self.__iter_at(n))
+        return (False, None)
+
+    def do_iter_children(self, parent: Gtk.TreeIter) -> (bool, Gtk.TreeIter):
+        return self.do_iter_nth_child(parent, 0)
+
+    def do_iter_parent(self, child: Gtk.TreeIter) -> (bool, Gtk.TreeIter):
+        return (False, None)
+    # }}}
+
+
+class PrefixIndex():
+    # {{{
+    """Case-insensitive sorted index of texts for prefix searching.
+Each search is two bisects. When a query extends the previous one, only the
+previous query's range is searched, and shortening a query (backspace) just
+falls back to a range that was already found.
+rows[n] is the original position of the nth text in sorted order."""
+    def __init__(self, texts: [str]):
+        keys = [str(text).casefold() for text in texts]
+        self.rows = sorted(range(len(keys)), key=keys.__getitem__)
+        self.keys = [keys[row] for row in self.rows]
+        # (query, lo, hi) for every query currently being extended
+        self.__stack = [("", 0, len(self.keys))]
+
+    def span(self, query: str) -> (int, int):
+        """Returns the lo, hi slice of rows whose texts start with query."""
+        query = query.casefold()
+        while not query.startswith(self.__stack[-1][0]):
+            self.__stack.pop()
+
+        previous, lo, hi = self.__stack[-1]
+        if query != previous:
+            lo = bisect.bisect_left(self.keys, query, lo, hi)
+            hi = bisect.bisect_right(self.keys, query + "\U0010ffff", lo, hi)
+            self.__stack.append((query, lo, hi))
+        return lo, hi
+
+    def search(self, query: str, limit: int = None) -> [int]:
+        """Returns original positions of texts starting with query,
+in sorted order."""
+        lo, hi = self.span(query)
+        if limit is not None:
+            hi = min(hi, lo + limit)
+        return self.rows[lo:hi]
+    # }}}
+
+
+class MinMaxPyramid():
+    # {{{
+    """Minimum and maximum of a series over blocks of every power of two
+size, so a plot can get one summary per pixel column without looking at
+every sample. Level k's block b covers samples [b * 2**k, (b + 1) * 2**k).
+NaNs are skipped.
+
+Given a series, it's wrapped without copying and levels are built the first
+time they're asked for.
+Given a capacity instead, series is a ring buffer keeping the newest
+capacity samples (rounded up to a power of two) and every level is a ring
+of its blocks. append() only redoes the blocks the new samples fall in.
+total counts every sample ever added, samples are numbered by it."""
+    def __init__(self, series: 'numpy.ndarray' = None, capacity: int = 0,
+                 dtype=float):
+        if capacity:
+            capacity = 1 << (capacity - 1).bit_length()
+            self.series = numpy.zeros(capacity, dtype)
+            self.total = 0
+            self.ring = True
+            self.__mins = [self.series]
+            self.__maxs = [self.series]
+            while capacity > 1:
+                capacity //= 2
+                self.__mins.append(numpy.zeros(capacity, dtype))
+                self.__maxs.append(numpy.zeros(capacity, dtype))
+        else:
+            self.series = numpy.asarray(series).ravel()
+            self.total = len(self.series)
+            self.ring = False
+            self.__mins = [self.series]
+            self.__maxs = [self.series]
+
+    @property
+    def first(self) -> int:
+        """Number of the oldest sample still held."""
+        return max(0, self.total - len(self.series)) if self.ring else 0
+
+    @property
+    def max_level(self) -> int:
+        """The level where a single block covers everything held."""
+        return (len(self.series) - 1).bit_length()
+
+    def __level(self, level: int):
+        while len(self.__mins) <= level:
+            starts = numpy.arange(0, len(self.__mins[-1]), 2)
+            self.__mins.append(numpy.fmin.reduceat(self.__mins[-1], starts))
+            self.__maxs.append(numpy.fmax.reduceat(self.__maxs[-1], starts))
+
+    def append(self, values):
+        """Adds samples to the end of a ring, dropping the oldest."""
+        assert self.ring, "append() needs a capacity"
+        values = numpy.asarray(values, self.series.dtype).ravel()
+        capacity = len(self.series)
+        if len(values) > capacity:
+            self.total += len(values) - capacity
+            values = values[-capacity:]
+        if not len(values):
+            return
+        start = self.total
+        self.total += len(values)
+        self.series[numpy.arange(start, self.total) % capacity] = values
+
+        for level in range(1, len(self.__mins)):
+            blocks = numpy.arange(start >> level,
+                                  ((self.total - 1) >> level) + 1)
+            # the newest block may only have its left half so far
+            left = blocks * 2
+            right = numpy.minimum(left + 1, (self.total - 1) >> (level - 1))
+            size = capacity >> (level - 1)
+            left %= size
+            right %= size
+            target = blocks % (capacity >> level)
+            mins, maxs = self.__mins[level - 1], self.__maxs[level - 1]
+            self.__mins[level][target] = numpy.fmin(mins[left], mins[right])
+            self.__maxs[level][target] = numpy.fmax(maxs[left], maxs[right])
+
+    def blocks(self, level: int, start: int, end: int
+               ) -> (int, 'numpy.ndarray', 'numpy.ndarray'):
+        """Returns the number of the first block actually held from
+[start, end) at level, then the minimums and maximums of the blocks."""
+        if not self.total:
+            return start, self.series[:0], self.series[:0]
+        last = (self.total - 1) >> level
+        end = min(end, last + 1)
+        if self.ring:
+            size = len(self.series) >> level
+            start = max(start, last - size + 1, 0)
+            rows = numpy.arange(start, max(start, end)) % size
+            return (start, self.__mins[level][rows],
+                    self.__maxs[level][rows])
+        self.__level(level)
+        start = max(start, 0)
+        return (start, self.__mins[level][start:end],
+                self.__maxs[level][start:end])
+
+    @property
+    def values(self) -> 'numpy.ndarray':
+        """Samples held, oldest first. A copy for rings."""
+        if self.ring:
+            return self.series[
+                numpy.arange(self.first, self.total) % len(self.series)
+            ]
+        return self.series
+    # }}}
+
+
 # ### CONTAINER TYPES ### #
 
 
@@ -77,26 +823,34 @@ launch the Gtk main loop with it."""
     def __init__(self, title: str, widget: Gtk.Widget,
                  width: int = -1, height: int = -1):
         super().__init__()
-        self.connect("destroy", Gtk.main_quit)
+        self.connect("destroy", self.__destroy)
         self.props.title = title
         self.add(widget)
         self.props.default_width = width
         self.props.default_height = height
 
+    def __destroy(self, *args):
+        cancel_coroutines()
+        Gtk.main_quit()
+
     def launch(self, *prelaunch: [callable, [callable, list]], show_all=True):
         """Launches the Gtk main engine, optoinally running prelaunch callables
 after showing all the widgets.
 Prelaunch entries may be a sub-list containing the callable and args.
+Prelaunch callables and handlers may be async def functions, they're run on
+bszgw's asyncio loop alongside Gtk. See run_coroutine()
 If show_all=False, widgets are not shown by default on launch."""
         self.present()
         if show_all:
             self.show_all()
         for x in prelaunch:
-            if len(x) == 1:
-                x[0]()
-            else:
-                x[0](*x[1:])
+            _timed(coroutine_handler(x[0]), self, "prelaunch")(*x[1:])
         Gtk.main()
+        # let cancelled coroutines run their cleanup
+        if _coroutine_tasks:
+            event_loop().run_until_complete(asyncio.gather(
+                *_coroutine_tasks, return_exceptions=True
+            ))
     # }}}
 
 
@@ -113,19 +867,23 @@ This allows you to visually build your boxes:
      e,
 ]"""
 
+    sub_orientation = 1 - orientation
+    # a lone item is used as-is, no need for a box around it
+    if len(widgets) == 1:
+        x = widgets[0]
+        if isinstance(x, list):
+            x = AutoBox(x, vspacing, hspacing, sub_orientation)
+        return x
+
     box = Gtk.Box.new(
         orientation,
         vspacing if orientation == Gtk.Orientation.VERTICAL else hspacing
     )
 
-    sub_orientation = 1 - orientation
     for x in widgets:
         if isinstance(x, list):
             x = AutoBox(x, vspacing, hspacing, sub_orientation)
 
-        if len(widgets) == 1:
-            return x
-
         if isinstance(x, Gtk.Widget):
             box.pack_start(x, True, True, 0)
 
@@ -157,6 +915,108 @@ width, height: if not None, overrides default dimension[s] when attaching."""
     # }}}
 
 
+class Occupancy():
+    # {{{
+    """Tracks which cells of a grid are taken using one bitset per row.
+Used by bszgw.Grid so collision detection doesn't have to ask GTK about every
+cell, but works on plain coordinates so layouts can be resolved without any
+widgets existing.
+
+Bit n of a row's mask is column `origin + n`. The origin moves left whenever a
+more negative column gets occupied, so masks are never shifted negatively."""
+    def __init__(self):
+        self.rows = {}
+        self.origin = 0
+        self.spans = {}
+        self.__overlaps = False
+
+    def clear(self):
+        self.rows.clear()
+        self.spans.clear()
+        self.origin = 0
+        self.__overlaps = False
+
+    def __mask(self, left: int, width: int) -> int:
+        """Bits for columns left to left + width, clipped to the origin."""
+        if left < self.origin:
+            width -= self.origin - left
+            left = self.origin
+        if width <= 0:
+            return 0
+        return ((1 << width) - 1) << (left - self.origin)
+
+    def add(self, key, left: int, top: int, width: int, height: int):
+        """Marks the area as taken by key.
+Overlapping areas are allowed, they just make discard() slower."""
+        if left < self.origin:
+            shift = self.origin - left
+            for row in self.rows:
+                self.rows[row] <<= shift
+            self.origin = left
+        mask = self.__mask(left, width)
+        for row in range(top, top + height):
+            taken = self.rows.get(row, 0)
+            if taken & mask:
+                self.__overlaps = True
+            self.rows[row] = taken | mask
+        self.spans[key] = (left, top, width, height)
+
+    def discard(self, key):
+        """Frees the area taken by key, if any."""
+        span = self.spans.pop(key, None)
+        if span is None:
+            return
+        if self.__overlaps:
+            # freed bits may still be covered by another key.
+            spans = list(self.spans.items())
+            self.clear()
+            for other, other_span in spans:
+                self.add(other, *other_span)
+            return
+        left, top, width, height = span
+        mask = ~self.__mask(left, width)
+        for row in range(top, top + height):
+            taken = self.rows.get(row, 0) & mask
+            if taken:
+                self.rows[row] = taken
+            else:
+                self.rows.pop(row, None)
+
+    def is_free(self, left: int, top: int,
+                width: int = 1, height: int = 1) -> bool:
+        mask = self.__mask(left, width)
+        return not any(self.rows.get(row, 0) & mask
+                       for row in range(top, top + height))
+
+    def find(self, direction: Gtk.DirectionType, left: int, top: int,
+             width: int = 1, height: int = 1) -> (int, int):
+        """Returns the first (left, top) from the given one, moving in
+direction, where a width x height area is entirely free.
+Instead of stepping a cell at a time it jumps straight past whatever
+collided."""
+        while True:
+            mask = self.__mask(left, width)
+            hits = [(row, self.rows[row] & mask)
+                    for row in range(top, top + height)
+                    if self.rows.get(row, 0) & mask]
+            if not hits:
+                return left, top
+
+            if direction == Gtk.DirectionType.DOWN:
+                top = hits[-1][0] + 1
+            elif direction == Gtk.DirectionType.RIGHT:
+                left = self.origin + max(
+                    hit.bit_length() for _, hit in hits)
+            elif direction == Gtk.DirectionType.UP:
+                top = hits[0][0] - height
+            elif direction == Gtk.DirectionType.LEFT:
+                left = self.origin - width + min(
+                    (hit & -hit).bit_length() - 1 for _, hit in hits)
+            else:
+                raise TypeError("Invalid direction")
+    # }}}
+
+
 class Grid(Gtk.Grid):
     # {{{
     """Gtk.Grid with easier widget attachment functions.
@@ -172,6 +1032,76 @@ Also has some common props in init."""
         self.props.row_spacing = row_spacing
         self.props.column_homogeneous = column_homogeneous
         self.props.row_homogeneous = row_homogeneous
+        self.__occupancy = Occupancy()
+        # child -> child-notify handler, for children moved by
+        # child_set_property() instead of through Grid
+        self.__watched = {}
+
+    def __span(self, child: Gtk.Widget) -> (int, int, int, int):
+        return tuple(self.child_get_property(child, prop) for prop in
+                     ("left-attach", "top-attach", "width", "height"))
+
+    def __reindex(self):
+        """Rebuilds the occupancy from GTK's child properties.
+Used after operations that shift existing children around."""
+        self.__occupancy.clear()
+        for child in self.get_children():
+            self.__occupancy.add(child, *self.__span(child))
+
+    def __track(self, child: Gtk.Widget):
+        self.__occupancy.add(child, *self.__span(child))
+        if child not in self.__watched:
+            self.__watched[child] = child.connect("child-notify",
+                                                  self.__child_notify)
+
+    def __child_notify(self, child: Gtk.Widget, pspec: GObject.ParamSpec):
+        if pspec.name in ("left-attach", "top-attach", "width", "height") \
+                and child.get_parent() is self:
+            self.__occupancy.discard(child)
+            self.__occupancy.add(child, *self.__span(child))
+
+    def attach(self, child: Gtk.Widget, left: int, top: int,
+               width: int = 1, height: int = 1):
+        """Gtk.Grid.attach, also recording the cells the child occupies."""
+        Gtk.Grid.attach(self, child, left, top, width, height)
+        self.__track(child)
+
+    def do_add(self, widget: Gtk.Widget):
+        # vfunc so Gtk.Container.add() is recorded too
+        Gtk.Grid.do_add(self, widget)
+        self.__track(widget)
+
+    def attach_next_to(self, *args):
+        Gtk.Grid.attach_next_to(self, *args)
+        self.__reindex()
+
+    def insert_column(self, position: int):
+        Gtk.Grid.insert_column(self, position)
+        self.__reindex()
+
+    def insert_row(self, position: int):
+        Gtk.Grid.insert_row(self, position)
+        self.__reindex()
+
+    def insert_next_to(self, *args):
+        Gtk.Grid.insert_next_to(self, *args)
+        self.__reindex()
+
+    def remove_column(self, position: int):
+        Gtk.Grid.remove_column(self, position)
+        self.__reindex()
+
+    def remove_row(self, position: int):
+        Gtk.Grid.remove_row(self, position)
+        self.__reindex()
+
+    def do_remove(self, widget: Gtk.Widget):
+        # vfunc so children removed by destroy() are vacated too.
+        Gtk.Grid.do_remove(self, widget)
+        self.__occupancy.discard(widget)
+        handler = self.__watched.pop(widget, None)
+        if handler is not None:
+            widget.disconnect(handler)
 
     def attach_all(self, direction: Gtk.DirectionType, *children,  # noqa: C901
                    column: int = 0, row: int = 0,
@@ -185,6 +1115,12 @@ direction: direction to 'push' widgets when they try to occupy the same space.
 Note all children's coords start at column, row instead of starting from the
 previous child's place."""
 
+        # First free spot found so far for each starting rectangle.
+        # Cells only fill up while attaching, so a child starting from the
+        # same spot as a previous one resumes the search where that one
+        # landed instead of walking the whole occupied run again.
+        resume = {}
+
         for child in children:
             # for automation purposes.
             if child is None:
@@ -202,28 +1138,19 @@ previous child's place."""
             if child.height is None:
                 child.height = base_height
 
-            left = column + child.col_off
-            top = row + child.row_off
-
             # collision detection.
-            # increment a grid cell in orientation if occupied
+            # move the whole child's area in direction until it's free
             # if there's a use case where widgets should be over
             # other widgets that should be done manually.
-            while True:
-                if not self.get_child_at(left, top):
-                    break
-                if direction == Gtk.DirectionType.DOWN:
-                    top += 1
-                elif direction == Gtk.DirectionType.RIGHT:
-                    left += 1
-                elif direction == Gtk.DirectionType.UP:
-                    top -= 1
-                elif direction == Gtk.DirectionType.LEFT:
-                    left -= 1
-                else:
-                    raise TypeError("Invalid direction")
+            start = (column + child.col_off, row + child.row_off,
+                     child.width, child.height)
+            left, top = self.__occupancy.find(
+                direction, *resume.get(start, start[:2]),
+                child.width, child.height
+            )
 
             self.attach(child.widget, left, top, child.width, child.height)
+            resume[start] = (left, top)
 
     def attach_all_down(self, *children, column: int = 0, row: int = 0,
                         base_width: int = 1, base_height: int = 1):
@@ -251,6 +1178,93 @@ previous child's place."""
     # }}}
 
 
+class LazyNotebook(Gtk.Notebook):
+    # {{{
+    """Gtk.Notebook whose pages are built on first view instead of upfront.
+pages is {title: factory}, where factory takes no arguments and returns the
+page's widget, much like a layout handed to AutoBox.
+
+value is {title: {name: value}}, read through a Form.from_container() of each
+page. Pages that aren't built report their defaults, overridden by anything
+set through value since, and get those values once built.
+keep: if > 0, at most that many pages stay built. The least recently viewed
+are destroyed, their values kept for when they're built again."""
+    def __init__(self, pages: {str: callable},
+                 defaults: {str: {str: object}} = None, keep: int = 0):
+        Gtk.Notebook.__init__(self)
+        self.factories = dict(pages)
+        self.defaults = {} if defaults is None else defaults
+        self.keep = keep
+        # built pages' Forms, least recently viewed first
+        self.__forms = collections.OrderedDict()
+        self.__saved = {}
+        self.__titles = list(self.factories)
+        self.__boxes = {}
+        for title in self.__titles:
+            self.__boxes[title] = Gtk.Box()
+            self.append_page(self.__boxes[title], Gtk.Label.new(title))
+        self.connect("switch-page", self.__switch_page)
+        self.connect("map", self.__map)
+
+    def __switch_page(self, notebook, page: Gtk.Widget, page_num: int):
+        if self.get_mapped():
+            self.build(self.__titles[page_num])
+
+    def __map(self, *args):
+        if self.get_current_page() >= 0:
+            self.build(self.__titles[self.get_current_page()])
+
+    def build(self, title: str) -> 'Form':
+        """Builds the page if it isn't yet and returns its Form."""
+        if title in self.__forms:
+            self.__forms.move_to_end(title)
+            return self.__forms[title]
+
+        widget = self.factories[title]()
+        self.__boxes[title].pack_start(widget, True, True, 0)
+        widget.show_all()
+        form = Form.from_container(widget)
+        form.set_values(self.__saved.pop(title, {}))
+        self.__forms[title] = form
+
+        while self.keep and len(self.__forms) > self.keep:
+            old, old_form = self.__forms.popitem(last=False)
+            self.__saved[old] = old_form.values()
+            for child in self.__boxes[old].get_children():
+                child.destroy()
+        return form
+
+    @property
+    def built(self) -> [str]:
+        """Titles of the pages currently built."""
+        return list(self.__forms)
+
+    def page_value(self, title: str) -> {str: object}:
+        if title in self.__forms:
+            return self.__forms[title].values()
+        values = dict(self.defaults.get(title, {}))
+        values.update(self.__saved.get(title, {}))
+        return values
+
+    def reset(self):
+        for form in self.__forms.values():
+            form.reset()
+        self.__saved.clear()
+
+    @property
+    def value(self) -> {str: {str: object}}:
+        return {title: self.page_value(title) for title in self.__titles}
+
+    @value.setter
+    def value(self, value: {str: {str: object}}):
+        for title, values in value.items():
+            if title in self.__forms:
+                self.__forms[title].set_values(values)
+            else:
+                self.__saved.setdefault(title, {}).update(values)
+    # }}}
+
+
 def Message(message: str, buttons: [str] = [],
             modal=False, close_button=True) -> int:
     # {{{
@@ -268,15 +1282,126 @@ If close_button, also appends Gtk.STOCK_CLOSE with a response of -1"""
     # }}}
 
 
+_message_pool = []
+_message_queue = collections.deque()
+_message_showing = None
+# hidden dialogs kept around for reuse
+MESSAGE_POOL = 1
+
+
+def _show_message():
+    global _message_showing
+    if _message_showing is not None or not _message_queue:
+        return
+    entry = _message_showing = _message_queue.popleft()
+    message, buttons, modal, close_button = entry["key"]
+
+    if _message_pool:
+        dialog = _message_pool.pop()
+        for button in dialog.get_action_area().get_children():
+            button.destroy()
+    else:
+        # closing the window is a response too, GtkDialog keeps it alive
+        dialog = Gtk.MessageDialog()
+
+    dialog.props.text = message
+    for n, b in enumerate(buttons):
+        dialog.add_button(b, n)
+    if close_button:
+        dialog.add_button(Gtk.STOCK_CLOSE, -1)
+    dialog.props.modal = modal
+    entry["handler"] = dialog.connect("response", _message_response, entry)
+    dialog.present()
+
+
+def _message_response(dialog: Gtk.MessageDialog, response: int,
+                       entry: dict):
+    global _message_showing
+    dialog.disconnect(entry["handler"])
+    dialog.hide()
+    if len(_message_pool) < MESSAGE_POOL:
+        _message_pool.append(dialog)
+    else:
+        dialog.destroy()
+    _message_showing = None
+
+    # a raising callback mustn't leave the rest of the queue stuck
+    try:
+        if not entry["future"].done():
+            entry["future"].set_result(response)
+        for callback in entry["callbacks"]:
+            callback(response)
+    finally:
+        _show_message()
+
+
+def MessageAsync(message: str, buttons: [str] = [],
+                 modal=False, close_button=True,
+                 callback: callable = None,
+                 coalesce: bool = True) -> asyncio.Future:
+    # {{{
+    """Like Message(), but returns immediately instead of running a nested
+main loop until a button is pressed.
+Returns an asyncio.Future on bszgw's event_loop() for the index of the button
+pressed, for coroutine handlers to await. callback, if given, is called
+with the index as well.
+Only one message shows at a time, others wait their turn. If coalesce, a
+message identical to one already showing or waiting shares its result
+instead of being shown again.
+Dialogs are hidden and reused instead of being rebuilt every time."""
+    key = (str(message), tuple(buttons), modal, close_button)
+    if coalesce:
+        for entry in [_message_showing, *_message_queue]:
+            if entry is not None and entry["key"] == key:
+                if callback is not None:
+                    entry["callbacks"].append(callback)
+                return entry["future"]
+
+    entry = {
+        "key": key,
+        "future": event_loop().create_future(),
+        "callbacks": [] if callback is None else [callback],
+    }
+    _message_queue.append(entry)
+    _show_message()
+    return entry["future"]
+    # }}}
+
+
 # ### WIDGETS ### #
 
 
 class Button(Gtk.Button):
     # {{{
-    """Gtk.Button. Has connect('clicked') built into init."""
-    def __init__(self, label: str, function: callable, *args):
+    """Gtk.Button. Has connect('clicked') built into init.
+function may be an async def function, see run_coroutine().
+If executor is given, function(*args) runs there through self.worker instead
+of blocking the main loop. Note it doesn't get the button as its first arg.
+done, error and policy are passed on to the Worker. With the default
+"disable" policy the button is insensitive while the job runs."""
+    def __init__(self, label: str, function: callable, *args,
+                 executor: concurrent.futures.Executor = None,
+                 done: callable = None, error: callable = None,
+                 policy: str = "disable"):
         super().__init__(label=label)
-        self.connect('clicked', function, *args if args else ())
+        if executor is None:
+            self.connect('clicked',
+                         _timed(coroutine_handler(function), self, "clicked"),
+                         *args if args else ())
+        else:
+            self.worker = Worker(
+                function, executor, done, error,
+                busy=self.__busy if policy == "disable" else None,
+                policy=policy,
+            )
+            self.connect('clicked',
+                         _timed(self.__clicked, self, "clicked"), args)
+
+    def __busy(self, busy: bool):
+        self.props.sensitive = not busy
+
+    def __clicked(self, button: Gtk.Button, args: tuple):
+        self.worker(*args)
     # }}}
 
 
@@ -306,10 +1431,15 @@ else it operates on the id_column text.
 Right now basically exclusively made for text. I want to implement more
 ComboBox/CellRenderer/TreeModel features but I'm not sure how to do that
 all in one or if it's even possible. Tempted to rename this ComboBoxText and
-just make new ComboBoxes for other types."""
+just make new ComboBoxes for other types.
+
+ids: the id column's contents, if already at hand. Lets value look ids up
+in a dict instead of having GTK scan the model, which is otherwise only
+done for SequenceModels since their columns are already Python lists."""
     def __init__(self, model: Gtk.TreeModel, value,
                  column: int = 0, id_column: int = 0,
-                 show_ids: bool = False, wrap: int = 0):
+                 show_ids: bool = False, wrap: int = 0,
+                 ids: [str] = None):
         # TODO: genuinely though why is this fucky in some widgets
         # super().__init__()
         Gtk.ComboBox.__init__(self)
@@ -328,8 +1458,176 @@ just make new ComboBoxes for other types."""
 
         self.props.wrap_width = wrap
         self.props.id_column = id_column
+
+        # row -> id and id -> row, so value doesn't make GTK scan the model.
+        # Kept up to date as rows are added, changed and removed.
+        self.__ids = None
+        self.__rows = None
+        self.__prefix = None
+        self.__model_handlers = []
+        self.__watch_model()
+        if ids is not None:
+            self.__ids = list(ids)
+
+        self.__typeahead = False
+        self.__typeahead_handler = None
+        self.__query = ""
+        self.__query_time = 0
+        self.connect("notify::model", self.__watch_model)
+        self.connect("notify::id-column", self.__invalidate)
+
         DataWidget.__init__(self, value, self, "changed")
 
+    def __watch_model(self, *args):
+        for model, handler in self.__model_handlers:
+            model.disconnect(handler)
+        self.__model_handlers = []
+        self.__invalidate()
+
+        model = self.props.model
+        if model is not None:
+            for signal, handler in (
+                ("row-changed", self.__row_changed),
+                ("row-inserted", self.__row_inserted),
+                ("row-deleted", self.__row_deleted),
+                ("rows-reordered", self.__invalidate),
+            ):
+                self.__model_handlers.append(
+                    (model, model.connect(signal, handler))
+                )
+
+    def __invalidate(self, *args):
+        self.__ids = None
+        self.__rows = None
+        self.__prefix = None
+
+    def __row_id(self, model: Gtk.TreeModel, tree_iter: Gtk.TreeIter) -> str:
+        row_id = model.get_value(tree_iter, self.props.id_column)
+        return None if row_id is None else str(row_id)
+
+    def __row_inserted(self, model: Gtk.TreeModel, path: Gtk.TreePath,
+                       tree_iter: Gtk.TreeIter):
+        self.__prefix = None
+        if self.__ids is None:
+            return
+        row = path.get_indices()[0]
+        if not isinstance(model, SequenceModel):
+            # a SequenceModel's column is __ids, and already has the row
+            self.__ids.insert(row, self.__row_id(model, tree_iter))
+        if self.__rows is None:
+            return
+        if row == len(self.__ids) - 1:
+            row_id = self.__ids[row]
+            self.__rows.setdefault(
+                None if row_id is None else str(row_id), row
+            )
+        else:
+            # later rows moved down, rebuilt from __ids when next needed
+            self.__rows = None
+
+    def __row_changed(self, model: Gtk.TreeModel, path: Gtk.TreePath,
+                      tree_iter: Gtk.TreeIter):
+        self.__prefix = None
+        if self.__ids is None or isinstance(model, SequenceModel):
+            return
+        row = path.get_indices()[0]
+        old = self.__ids[row]
+        new = self.__row_id(model, tree_iter)
+        if old == new:
+            return
+        self.__ids[row] = new
+        if self.__rows is None:
+            return
+        if self.__rows.get(old) == row:
+            del self.__rows[old]
+            if old in self.__ids:
+                self.__rows[old] = self.__ids.index(old)
+        if self.__rows.get(new, row) >= row:
+            self.__rows[new] = row
+
+    def __row_deleted(self, model: Gtk.TreeModel, path: Gtk.TreePath):
+        self.__prefix = None
+        if self.__ids is None:
+            return
+        if not isinstance(model, SequenceModel):
+            del self.__ids[path.get_indices()[0]]
+        self.__rows = None
+
+    def __index(self) -> {str: int}:
+        """Returns the id index, building it from the known ids if needed,
+or None if they aren't known. First row wins for duplicate ids, same as
+GTK's active_id."""
+        if self.__ids is None:
+            model = self.props.model
+            if isinstance(model, SequenceModel) and model.rows is None:
+                # already a Python sequence, no need to read it through GTK
+                self.__ids = model.columns[self.props.id_column]
+            else:
+                return None
+        if self.__rows is None:
+            self.__rows = {}
+            for row, row_id in enumerate(self.__ids):
+                self.__rows.setdefault(
+                    None if row_id is None else str(row_id), row
+                )
+        return self.__rows
+
+    def search(self, query: str, limit: int = None) -> [int]:
+        """Returns the rows whose column text starts with query,
+case-insensitive and in alphabetical order.
+The index behind it is built on first use and kept until the model changes,
+so repeatedly extending a query only searches the previous results."""
+        if self.__prefix is None:
+            model = self.props.model
+            if isinstance(model, SequenceModel) and model.rows is None:
+                texts = model.columns[self.column]
+            else:
+                texts = [row[self.column] for row in model]
+            self.__prefix = PrefixIndex(texts)
+        return self.__prefix.search(query, limit)
+
+    def __typeahead_key(self, widget, event: Gdk.EventKey) -> bool:
+        if event.state & (Gdk.ModifierType.CONTROL_MASK |
+                          Gdk.ModifierType.MOD1_MASK):
+            return False
+
+        if event.keyval == Gdk.KEY_BackSpace:
+            query = self.__query[:-1]
+        else:
+            char = Gdk.keyval_to_unicode(event.keyval)
+            if not char or not chr(char).isprintable():
+                return False
+            query = self.__query
+            # start a new search after a pause in typing
+            if event.time - self.__query_time > 1000:
+                query = ""
+            query += chr(char)
+
+        self.__query = query
+        self.__query_time = event.time
+        if query:
+            rows = self.search(query, 1)
+            if rows:
+                self.props.active = rows[0]
+        return True
+
+    @property
+    def typeahead(self) -> bool:
+        """If True, typing while the ComboBox has focus selects the first
+row starting with what was typed. See search()"""
+        return self.__typeahead
+
+    @typeahead.setter
+    def typeahead(self, typeahead: bool):
+        self.__typeahead = typeahead
+        if typeahead and self.__typeahead_handler is None:
+            self.__typeahead_handler = self.connect(
+                "key-press-event", self.__typeahead_key
+            )
+        elif not typeahead and self.__typeahead_handler is not None:
+            self.disconnect(self.__typeahead_handler)
+            self.__typeahead_handler = None
+
     def new(items: [str], value: int, wrap: int = 0) -> 'ComboBox':
         """Creates a new ComboBox from a list/tuple of strings"""
         model = Gtk.ListStore(str)
@@ -351,6 +1649,24 @@ just make new ComboBoxes for other types."""
         return ComboBox(
             model=model, value=value,
             id_column=1, show_ids=show_ids, wrap=wrap,
+            ids=list(dictionary.values()),
+        )
+
+    def new_lazy(items: collections.abc.Sequence, value,
+                 show_ids: bool = True, wrap: int = 0) -> 'ComboBox':
+        """Creates a new ComboBox backed by a SequenceModel instead of a
+Gtk.ListStore, so rows are read from items only when displayed.
+A sequence acts like new(), a mapping acts like new_dict().
+Mappings get their keys and values listed by reference, nothing else is
+copied."""
+        if isinstance(items, collections.abc.Mapping):
+            return ComboBox(
+                model=SequenceModel(list(items), list(items.values())),
+                value=value, id_column=1, show_ids=show_ids, wrap=wrap,
+            )
+
+        return ComboBox(
+            model=SequenceModel(items), value=value, wrap=wrap
         )
 
     @property
@@ -358,14 +1674,29 @@ just make new ComboBoxes for other types."""
         if self.props.id_column == self.column:
             return self.props.active
         else:
-            return self.props.active_id
+            active = self.props.active
+            if active < 0:
+                return None
+            if self.__index() is None:
+                return self.props.active_id
+            row_id = self.__ids[active]
+            return None if row_id is None else str(row_id)
 
     @value.setter
     def value(self, value):
         if self.props.id_column == self.column:
             self.props.active = value
+        elif value is None:
+            self.props.active = -1
         else:
-            self.props.active_id = value
+            rows = self.__index()
+            if rows is None:
+                self.props.active_id = value
+                return
+            # unknown ids leave the selection alone, like active_id does
+            row = rows.get(value)
+            if row is not None:
+                self.props.active = row
     # }}}
 
 
@@ -374,9 +1705,15 @@ class Entry(Grid, DataWidget):
     """Creates a scrollable text entry widget.
 For self.entry, multi-line uses Gtk.TextView and single-line uses Gtk.Entry.
 No .new() method, as the widgets create their own buffers on creation.
-Use the text_buffer property to set new buffers instead."""
+Use the text_buffer property to set new buffers instead.
+
+For streaming output, append() adds to the end without replacing the text,
+and get_range() reads part of it without copying the whole buffer.
+In multi-line mode, max_lines and max_chars turn the entry into a ring,
+dropping whole lines from the start once either is exceeded. 0 is no limit."""
     def __init__(self, value: str, label: str = "", multi_line: bool = False,
-                 min_width: int = 200, min_height: int = 100):
+                 min_width: int = 200, min_height: int = 100,
+                 max_lines: int = 0, max_chars: int = 0):
         super().__init__()
 
         self.__multi_line = multi_line
@@ -400,7 +1737,88 @@ Use the text_buffer property to set new buffers instead."""
 
         self.min_width = min_width
         self.min_height = min_height
-        DataWidget.__init__(self, value, self.text_buffer, "changed")
+        self.__max_lines = max_lines
+        self.__max_chars = max_chars
+        # Gtk.EntryBuffer has no changed signal, the Gtk.Entry does.
+        DataWidget.__init__(
+            self, value, self.text_buffer if multi_line else self.entry,
+            "changed"
+        )
+
+    def __trim(self):
+        """Drops lines from the start of a multi-line buffer until it fits
+max_lines and max_chars."""
+        if not self.__multi_line:
+            return
+        buffer = self.text_buffer
+        if self.__max_lines and buffer.get_line_count() > self.__max_lines:
+            buffer.delete(
+                buffer.get_start_iter(),
+                buffer.get_iter_at_line(
+                    buffer.get_line_count() - self.__max_lines
+                ),
+            )
+        if self.__max_chars and buffer.get_char_count() > self.__max_chars:
+            offset = buffer.get_char_count() - self.__max_chars
+            end = buffer.get_iter_at_offset(offset)
+            # whole lines where possible, but if the last line alone is
+            # too long, cut into it rather than emptying the buffer
+            if not end.starts_line() and not end.forward_line():
+                end = buffer.get_iter_at_offset(offset)
+            buffer.delete(buffer.get_start_iter(), end)
+
+    def append(self, text: str):
+        """Inserts text at the end of the buffer, trimming it afterwards if
+max_lines or max_chars are set."""
+        buffer = self.text_buffer
+        if self.__multi_line:
+            buffer.insert(buffer.get_end_iter(), text)
+            self.__trim()
+        else:
+            buffer.insert_text(buffer.get_length(), text, -1)
+
+    def get_range(self, start: int = 0, end: int = -1) -> str:
+        """Returns the text between character offsets start and end.
+end=-1 reads to the end of the text."""
+        buffer = self.text_buffer
+        if not self.__multi_line:
+            return buffer.props.text[start:None if end < 0 else end]
+        return buffer.get_text(
+            buffer.get_iter_at_offset(start),
+            buffer.get_end_iter() if end < 0 else
+            buffer.get_iter_at_offset(end),
+            True
+        )
+
+    def get_lines(self, first: int, last: int = -1) -> str:
+        """Returns lines first up to but not including last.
+last=-1 reads to the end of the text. Multi-line only."""
+        assert self.__multi_line
+        buffer = self.text_buffer
+        return buffer.get_text(
+            buffer.get_iter_at_line(first),
+            buffer.get_end_iter() if last < 0 else
+            buffer.get_iter_at_line(last),
+            True
+        )
+
+    @property
+    def max_lines(self) -> int:
+        return self.__max_lines
+
+    @max_lines.setter
+    def max_lines(self, max_lines: int):
+        self.__max_lines = max_lines
+        self.__trim()
+
+    @property
+    def max_chars(self) -> int:
+        return self.__max_chars
+
+    @max_chars.setter
+    def max_chars(self, max_chars: int):
+        self.__max_chars = max_chars
+        self.__trim()
 
     @property
     def min_height(self) -> int:
@@ -436,46 +1854,721 @@ Use the text_buffer property to set new buffers instead."""
     @value.setter
     def value(self, value: str):
         self.text_buffer.props.text = value
+        self.__trim()
     # }}}
 
 
+# byte offsets of red, green, blue and alpha in a cairo ARGB32 pixel,
+# which is a native-endian 32 bit int
+_CAIRO_RGBA = (2, 1, 0, 3) if sys.byteorder == "little" else (1, 2, 3, 0)
+
+
+def _downsample(block: 'numpy.ndarray') -> 'numpy.ndarray':
+    """Averages 2x2 pixels of a uint8 image with even dimensions."""
+    total = block[0::2, 0::2].astype(numpy.uint16)
+    total += block[1::2, 0::2]
+    total += block[0::2, 1::2]
+    total += block[1::2, 1::2]
+    total += 2
+    total >>= 2
+    return total.astype(numpy.uint8)
+
+
+class Image(Grid, DataWidget):
+    # {{{
+    """Displays a uint8 NumPy array of shape (height, width),
+(height, width, 3) or (height, width, 4), without copying it.
+Image.open_raw() memory-maps a raw pixel file the same way.
+
+Only what's visible at the current zoom is converted for cairo, one
+redraw's worth at a time. Zoomed out, it reads from a pyramid of halved
+copies built as they're first needed. After changing part of the array in
+place, update() refreshes that part of the pyramid and redraws just it.
+Scroll to pan, Ctrl+scroll to zoom.
+
+Needs numpy and pycairo."""
+    __gsignals__ = {"changed": (GObject.SignalFlags.RUN_FIRST, None, ())}
+
+    def __init__(self, array: 'numpy.ndarray', label: str = "",
+                 zoom: float = 1.0, min_width: int = 200,
+                 min_height: int = 200):
+        if numpy is None or cairo is None:
+            raise ImportError("bszgw.Image needs numpy and pycairo")
+        super().__init__()
+
+        if label:
+            self.label = Gtk.Label.new(label)
+            self.attach(self.label, 0, 0, 2, 1)
+
+        self.drawing_area = Gtk.DrawingArea.new()
+        self.drawing_area.props.expand = True
+        self.drawing_area.set_size_request(min_width, min_height)
+        self.drawing_area.add_events(Gdk.EventMask.SCROLL_MASK
+                                     | Gdk.EventMask.SMOOTH_SCROLL_MASK)
+        self.drawing_area.connect("draw", self.__draw)
+        self.drawing_area.connect("scroll-event", self.__scroll)
+        self.drawing_area.connect("size-allocate", self.__configure_scroll)
+
+        # scrolled by hand, the area itself is only ever the visible size
+        self.hadjustment = Gtk.Adjustment()
+        self.vadjustment = Gtk.Adjustment()
+        for adjustment in (self.hadjustment, self.vadjustment):
+            adjustment.connect("value-changed",
+                               lambda *args: self.drawing_area.queue_draw())
+        self.attach(self.drawing_area, 0, 1, 1, 1)
+        self.attach(Gtk.Scrollbar.new(Gtk.Orientation.VERTICAL,
+                                      self.vadjustment), 1, 1, 1, 1)
+        self.attach(Gtk.Scrollbar.new(Gtk.Orientation.HORIZONTAL,
+                                      self.hadjustment), 0, 2, 1, 1)
+
+        self.__zoom = zoom
+        self.__levels = []
+        self.__buffer = None
+        DataWidget.__init__(self, array, self, "changed")
+
+    def open_raw(path: str, width: int, height: int, channels: int = 3,
+                 offset: int = 0, mode: str = "r", **kwargs) -> 'Image':
+        """Creates an Image from a file of raw uint8 pixels, memory-mapped
+so only the parts being shown are ever read.
+Use mode="r+" to be able to write to the array and update().
+Other kwargs go to Image()."""
+        if numpy is None:
+            raise ImportError("bszgw.Image needs numpy and pycairo")
+        shape = (height, width) if channels == 1 \
+            else (height, width, channels)
+        return Image(numpy.memmap(path, numpy.uint8, mode, offset, shape),
+                     **kwargs)
+
+    def __level(self, level: int) -> 'numpy.ndarray':
+        """Returns the array halved level times, building it if needed."""
+        while len(self.__levels) <= level:
+            previous = self.__levels[-1]
+            height = previous.shape[0] // 2
+            width = previous.shape[1] // 2
+            self.__levels.append(
+                _downsample(previous[:height * 2, :width * 2])
+            )
+        return self.__levels[level]
+
+    def __pick_level(self) -> int:
+        """Smallest pyramid level still at least as big as the display."""
+        if self.__zoom >= 1:
+            return 0
+        array = self.__levels[0]
+        return max(0, min(
+            int(math.log2(1 / self.__zoom)),
+            int(math.log2(min(array.shape[:2]))),
+        ))
+
+    def __surface(self, crop: 'numpy.ndarray') -> 'cairo.ImageSurface':
+        """Converts crop into a cairo surface backed by a reused buffer."""
+        height, width = crop.shape[:2]
+        stride = cairo.ImageSurface.format_stride_for_width(
+            cairo.FORMAT_ARGB32, width
+        )
+        if self.__buffer is None or self.__buffer.size < height * stride:
+            self.__buffer = numpy.empty(height * stride, numpy.uint8)
+        pixels = self.__buffer[:height * stride].reshape(
+            height, stride // 4, 4
+        )[:, :width]
+
+        red, green, blue, alpha = _CAIRO_RGBA
+        if crop.ndim == 2:
+            crop = crop[..., numpy.newaxis]
+        if crop.shape[2] == 4:
+            # cairo wants premultiplied alpha
+            pixels[..., alpha] = crop[..., 3]
+            rgb = crop[..., :3] * crop[..., 3:].astype(numpy.uint16)
+            rgb += 127
+            rgb //= 255
+        else:
+            pixels[..., alpha] = 255
+            rgb = crop
+        pixels[..., [red, green, blue]] = \
+            rgb[..., [0, 1, 2] if rgb.shape[2] == 3 else [0, 0, 0]]
+
+        return cairo.ImageSurface.create_for_data(
+            self.__buffer, cairo.FORMAT_ARGB32, width, height, stride
+        )
+
+    def __draw(self, area: Gtk.DrawingArea, cr: 'cairo.Context') -> bool:
+        if not self.__levels:
+            return False
+        level = self.__pick_level()
+        array = self.__level(level)
+        # display pixels per pixel of this level
+        scale = self.__zoom * 2 ** level
+        left = self.hadjustment.props.value
+        top = self.vadjustment.props.value
+
+        # only the area being redrawn, which may be a single update()
+        x1, y1, x2, y2 = cr.clip_extents()
+        column = max(0, math.floor((left + x1) / scale))
+        row = max(0, math.floor((top + y1) / scale))
+        end_column = min(array.shape[1], math.ceil((left + x2) / scale))
+        end_row = min(array.shape[0], math.ceil((top + y2) / scale))
+        if column >= end_column or row >= end_row:
+            return False
+
+        surface = self.__surface(array[row:end_row, column:end_column])
+        cr.translate(column * scale - left, row * scale - top)
+        cr.scale(scale, scale)
+        cr.set_source_surface(surface, 0, 0)
+        cr.get_source().set_filter(
+            cairo.FILTER_NEAREST if scale > 1 else cairo.FILTER_GOOD
+        )
+        cr.paint()
+        surface.finish()
+        return False
+
+    def __configure_scroll(self, *args):
+        allocation = self.drawing_area.get_allocation()
+        if self.__levels:
+            height, width = self.__levels[0].shape[:2]
+        else:
+            height = width = 0
+        for adjustment, size, page in (
+            (self.hadjustment, width * self.__zoom, allocation.width),
+            (self.vadjustment, height * self.__zoom, allocation.height),
+        ):
+            page = min(page, size)
+            adjustment.configure(
+                min(adjustment.props.value, size - page), 0, size,
+                page / 10, page * 0.9, page,
+            )
+
+    def __scroll(self, area: Gtk.DrawingArea, event: Gdk.EventScroll) -> bool:
+        smooth, dx, dy = event.get_scroll_deltas()
+        if not smooth:
+            dx, dy = {
+                Gdk.ScrollDirection.UP: (0, -1),
+                Gdk.ScrollDirection.DOWN: (0, 1),
+                Gdk.ScrollDirection.LEFT: (-1, 0),
+                Gdk.ScrollDirection.RIGHT: (1, 0),
+            }.get(event.direction, (0, 0))
+
+        if event.state & Gdk.ModifierType.CONTROL_MASK:
+            self.zoom_at(self.__zoom * 2 ** (-dy / 2), event.x, event.y)
+        else:
+            # adjustments clamp the value themselves
+            for adjustment, delta in ((self.hadjustment, dx),
+                                      (self.vadjustment, dy)):
+                adjustment.props.value += \
+                    delta * adjustment.props.step_increment
+        return True
+
+    def zoom_at(self, zoom: float, x: float, y: float):
+        """Sets zoom, keeping the image under widget coordinates x, y
+in place."""
+        image_x = (self.hadjustment.props.value + x) / self.__zoom
+        image_y = (self.vadjustment.props.value + y) / self.__zoom
+        self.__zoom = zoom
+        self.__configure_scroll()
+        self.hadjustment.props.value = image_x * zoom - x
+        self.vadjustment.props.value = image_y * zoom - y
+        self.drawing_area.queue_draw()
+
+    def update(self, x: int = 0, y: int = 0,
+               width: int = None, height: int = None):
+        """Call after changing the array in place. Refreshes the pyramid
+levels built so far and redraws only the changed rectangle.
+Leaving width/height out covers the rest of the array."""
+        if not self.__levels:
+            return
+        array = self.__levels[0]
+        x2 = array.shape[1] if width is None else x + width
+        y2 = array.shape[0] if height is None else y + height
+        for level in range(1, len(self.__levels)):
+            # each level gets the whole 2x2 blocks the change touched
+            x, y = x // 2, y // 2
+            x2, y2 = -(-x2 // 2), -(-y2 // 2)
+            target = self.__levels[level]
+            x2 = min(x2, target.shape[1])
+            y2 = min(y2, target.shape[0])
+            if x < x2 and y < y2:
+                target[y:y2, x:x2] = _downsample(
+                    self.__levels[level - 1][y * 2:y2 * 2, x * 2:x2 * 2]
+                )
+
+        scale = self.__zoom * 2 ** (len(self.__levels) - 1)
+        left = self.hadjustment.props.value
+        top = self.vadjustment.props.value
+        self.drawing_area.queue_draw_area(
+            math.floor(x * scale - left), math.floor(y * scale - top),
+            math.ceil((x2 - x) * scale) + 1, math.ceil((y2 - y) * scale) + 1,
+        )
+        self.emit("changed")
+
+    @property
+    def zoom(self) -> float:
+        """Display pixels per array pixel."""
+        return self.__zoom
+
+    @zoom.setter
+    def zoom(self, zoom: float):
+        allocation = self.drawing_area.get_allocation()
+        self.zoom_at(zoom, allocation.width / 2, allocation.height / 2)
+
+    @property
+    def value(self) -> 'numpy.ndarray':
+        return self.__levels[0] if self.__levels else None
+
+    @value.setter
+    def value(self, value: 'numpy.ndarray'):
+        if value is not None:
+            # no copy for arrays and memmaps already in uint8
+            value = numpy.asarray(value)
+            if value.dtype != numpy.uint8 or not (
+                value.ndim == 2
+                or value.ndim == 3 and value.shape[2] in (1, 3, 4)
+            ):
+                raise ValueError("Image needs a uint8 array of shape "
+                                 "(h, w), (h, w, 3) or (h, w, 4)")
+        self.__levels = [] if value is None else [value]
+        self.__configure_scroll()
+        self.drawing_area.queue_draw()
+        self.emit("changed")
+    # }}}
+
+
+class Plot(Grid, DataWidget):
+    # {{{
+    """Line plot of a NumPy series, for live traces and sparklines.
+Each pixel column is drawn from the minimum and maximum of its samples, read
+from a MinMaxPyramid. Columns line up with power of two blocks of samples,
+so a level of the pyramid is a zoom level and appending only draws the new
+columns, shifting the ones already drawn.
+
+data: 1D array to plot. It isn't copied.
+capacity: if set, data is copied into a ring buffer of at least this many
+samples instead, and append() adds to it.
+span: how many of the newest samples to show, rounded up to fill whole
+columns. 0 shows everything held.
+min_value and max_value: fixed y range. Otherwise it fits what's shown.
+value: the samples held, oldest first.
+
+Needs numpy and pycairo."""
+    __gsignals__ = {"changed": (GObject.SignalFlags.RUN_FIRST, None, ())}
+
+    def __init__(self, data: 'numpy.ndarray' = None, label: str = "",
+                 capacity: int = 0, span: int = 0,
+                 min_value: float = None, max_value: float = None,
+                 min_width: int = 200, min_height: int = 50):
+        if numpy is None or cairo is None:
+            raise ImportError("bszgw.Plot needs numpy and pycairo")
+        super().__init__()
+
+        if label:
+            self.label = Gtk.Label.new(label)
+            self.attach_all_down(self.label)
+
+        self.drawing_area = Gtk.DrawingArea.new()
+        self.drawing_area.props.expand = True
+        self.drawing_area.set_size_request(min_width, min_height)
+        self.drawing_area.connect("draw", self.__draw)
+        self.attach_all_down(self.drawing_area)
+
+        self.capacity = capacity
+        self.__span = span
+        self.__min_value = min_value
+        self.__max_value = max_value
+        self.pyramid = None
+        self.__surface = None
+        # (level, pitch, y range, size) and columns of what's on __surface
+        self.__drawn = None
+        self.__drawn_first = 0
+        self.__drawn_last = 0
+        DataWidget.__init__(self, data, self, "changed")
+
+    def append(self, values):
+        """Adds samples to the ring buffer. Needs a capacity."""
+        self.pyramid.append(values)
+        self.drawing_area.queue_draw()
+        self.emit("changed")
+
+    def __columns(self, width: int) -> (int, int, int, int):
+        """Returns the level, pixels per column, and first and last column
+to show in width pixels."""
+        pyramid = self.pyramid
+        span = self.__span or pyramid.total - pyramid.first
+        span = max(1, min(span, pyramid.total - pyramid.first))
+        if span >= width:
+            pitch = 1
+            level = min((math.ceil(span / width) - 1).bit_length(),
+                        pyramid.max_level)
+        else:
+            pitch = max(1, width // span)
+            level = 0
+        last = (pyramid.total - 1) >> level
+        first = max(last - width // pitch + 1,
+                    (pyramid.total - span) >> level)
+        return level, pitch, first, last
+
+    def __render(self, width: int, height: int):
+        """Brings __surface up to date, drawing as few columns as it can."""
+        if not self.pyramid.total:
+            self.__surface = None
+            self.__drawn = None
+            return
+        level, pitch, first, last = self.__columns(width)
+
+        low, high = self.__min_value, self.__max_value
+        if low is None or high is None:
+            _, mins, maxs = self.pyramid.blocks(level, first, last + 1)
+            if low is None:
+                low = numpy.nanmin(mins) if len(mins) else 0
+            if high is None:
+                high = numpy.nanmax(maxs) if len(maxs) else 1
+            if not (math.isfinite(low) and math.isfinite(high)):
+                low, high = 0, 1
+        if high <= low:
+            low, high = low - 0.5, high + 0.5
+
+        state = (level, pitch, low, high, width, height)
+        keep = self.__drawn == state and first >= self.__drawn_first
+        if keep and first == self.__drawn_first \
+                and last == self.__drawn_last:
+            return
+        surface = self.drawing_area.get_window().create_similar_surface(
+            cairo.CONTENT_COLOR_ALPHA, width, height
+        )
+        cr = cairo.Context(surface)
+        if keep:
+            # keep what's drawn, shifted, and redo from the last column
+            # drawn, which may have been partial
+            cr.set_source_surface(
+                self.__surface, (self.__drawn_first - first) * pitch, 0
+            )
+            cr.paint()
+            start = max(first, self.__drawn_last)
+        else:
+            start = first
+
+        cr.rectangle((start - first) * pitch, 0, width, height)
+        cr.clip()
+        cr.set_operator(cairo.OPERATOR_CLEAR)
+        cr.paint()
+        cr.set_operator(cairo.OPERATOR_OVER)
+        Gdk.cairo_set_source_rgba(cr, self.get_style_context().get_color(
+            self.get_state_flags()
+        ))
+
+        # one column before start to join up with
+        begin, mins, maxs = self.pyramid.blocks(level, start - 1, last + 1)
+        scale = (height - 1) / (high - low)
+        tops = numpy.clip((high - maxs) * scale, -1, height)
+        bottoms = numpy.clip((high - mins) * scale, -1, height)
+        xs = (numpy.arange(begin, begin + len(mins)) - first) * pitch
+        if pitch == 1:
+            # bars overlap the previous column's so steep edges stay joined
+            tops[1:] = numpy.fmin(tops[1:], bottoms[:-1])
+            bottoms[1:] = numpy.fmax(bottoms[1:], tops[:-1])
+            for x, top, bottom in zip(xs.tolist(), tops.tolist(),
+                                      bottoms.tolist()):
+                if math.isfinite(top) and math.isfinite(bottom):
+                    cr.rectangle(x, top, 1, bottom - top + 1)
+            cr.fill()
+        else:
+            # one sample per column, so tops and bottoms are the same
+            centers = xs + pitch / 2
+            for x, y in zip(centers.tolist(), tops.tolist()):
+                if math.isfinite(y):
+                    cr.line_to(x, y + 0.5)
+                else:
+                    cr.new_sub_path()
+            cr.set_line_width(1)
+            cr.stroke()
+
+        self.__surface = surface
+        self.__drawn = state
+        self.__drawn_first = first
+        self.__drawn_last = last
+
+    def __draw(self, area: Gtk.DrawingArea, cr: 'cairo.Context') -> bool:
+        self.__render(area.get_allocated_width(),
+                      area.get_allocated_height())
+        if self.__surface is not None:
+            cr.set_source_surface(self.__surface, 0, 0)
+            cr.paint()
+        return False
+
+    @property
+    def span(self) -> int:
+        return self.__span
+
+    @span.setter
+    def span(self, span: int):
+        self.__span = span
+        self.drawing_area.queue_draw()
+
+    @property
+    def min_value(self) -> float:
+        return self.__min_value
+
+    @min_value.setter
+    def min_value(self, min_value: float):
+        self.__min_value = min_value
+        self.drawing_area.queue_draw()
+
+    @property
+    def max_value(self) -> float:
+        return self.__max_value
+
+    @max_value.setter
+    def max_value(self, max_value: float):
+        self.__max_value = max_value
+        self.drawing_area.queue_draw()
+
+    @property
+    def value(self) -> 'numpy.ndarray':
+        return self.pyramid.values
+
+    @value.setter
+    def value(self, value: 'numpy.ndarray'):
+        if self.capacity:
+            self.pyramid = MinMaxPyramid(capacity=self.capacity)
+            if value is not None:
+                self.pyramid.append(value)
+        else:
+            self.pyramid = MinMaxPyramid(
+                numpy.empty(0) if value is None else value
+            )
+        self.__drawn = None
+        self.drawing_area.queue_draw()
+        self.emit("changed")
+    # }}}
+
+
+# buttons RadioButtons(lazy=True) builds on map, then per idle callback
+RADIO_CHUNK = 50
+
+
 class RadioButtons(Grid, DataWidget):
     # {{{
     """Widget for choosing an option from a list.
-Limited alternate to ComboBox"""
+Limited alternate to ComboBox.
+The active index is kept up to date from the buttons' toggled signals, so
+reading value doesn't have to look at every button.
+If lazy=True, no buttons are built until the widget is first mapped. Then
+the active one and the first RADIO_CHUNK go up at once and the rest
+RADIO_CHUNK per idle callback, so a long group doesn't stall its first frame.
+Reading radio_buttons builds whatever is left. value works the same either
+way."""
+    __gsignals__ = {"changed": (GObject.SignalFlags.RUN_FIRST, None, ())}
+
     def __init__(self, buttons: [str], value: int, label="",
-                 orientation=Gtk.Orientation.VERTICAL):
+                 orientation=Gtk.Orientation.VERTICAL, lazy: bool = False):
         assert len(buttons) > 1
         super().__init__()
         self.set_orientation(Gtk.Orientation.VERTICAL)
         if label:
             self.label = Gtk.Label.new(label)
             self.attach_all_down(self.label)
-        self.radio_buttons = []
-        for num, var in enumerate(buttons):
-            self.radio_buttons.append(Gtk.RadioButton.new_with_label(
-                None, var))
 
-            if num > 0:
-                self.radio_buttons[num].join_group(self.radio_buttons[0])
+        self.labels = list(buttons)
+        self.__orientation = orientation
+        # None for buttons not built yet
+        self.__radio_buttons = []
+        self.__group = None
+        # buttons before this index are all built
+        self.__next = 0
+        self.__source = None
+        self.__active = range(len(self.labels))[value]
+        self.__map_handler = None
+        if lazy:
+            self.__map_handler = self.connect("map", self.__mapped)
+            self.connect("destroy", self.__stop)
+        else:
+            self.__build()
+
+        DataWidget.__init__(self, value, self, "changed")
 
-        if orientation == Gtk.Orientation.VERTICAL:
-            self.attach_all_down(*self.radio_buttons)
-        elif orientation == Gtk.Orientation.HORIZONTAL:
-            self.attach_all_right(*self.radio_buttons, row=1)
+    def __mapped(self, *args):
+        self.__build(RADIO_CHUNK)
+        if self.__next < len(self.labels):
+            self.__source = GLib.idle_add(self.__build_more)
+
+    def __build_more(self) -> bool:
+        self.__build(RADIO_CHUNK)
+        if self.__next < len(self.labels):
+            return True
+        self.__source = None
+        return False
+
+    def __stop(self, *args):
+        if self.__source is not None:
+            GLib.source_remove(self.__source)
+            self.__source = None
+
+    def __build(self, count: int = None):
+        """Builds the next count buttons, or all that are left."""
+        if self.__map_handler is not None:
+            self.disconnect(self.__map_handler)
+            self.__map_handler = None
+        if not self.__radio_buttons:
+            self.__radio_buttons = [None] * len(self.labels)
+            # first, as a new group starts out with its first button active
+            self.__add_button(self.__active)
+
+        end = len(self.labels)
+        if count is not None:
+            end = min(self.__next + count, end)
+        for num in range(self.__next, end):
+            if self.__radio_buttons[num] is None:
+                self.__add_button(num)
+        self.__next = end
+
+    def __add_button(self, num: int):
+        button = Gtk.RadioButton.new_with_label_from_widget(
+            self.__group, self.labels[num]
+        )
+        if self.__group is None:
+            self.__group = button
+        button.connect("toggled", self.__toggled, num)
+        self.__radio_buttons[num] = button
+
+        # same spots attach_all would find, without the collision search
+        if self.__orientation == Gtk.Orientation.VERTICAL:
+            self.attach(button, 0, num + (1 if hasattr(self, "label") else 0))
+        elif self.__orientation == Gtk.Orientation.HORIZONTAL:
+            self.attach(button, num, 1)
+
+        # built while mapping, after show_all() already went through
+        if self.get_visible():
+            button.show()
+
+    def append(self, label: str):
+        """Adds another option at the end."""
+        self.labels.append(label)
+        if self.__radio_buttons:
+            self.__radio_buttons.append(None)
+            # otherwise the idle callback gets to it
+            if self.__source is None:
+                self.__build()
+
+    def __toggled(self, button: Gtk.RadioButton, num: int):
+        if button.props.active and self.__active != num:
+            self.__active = num
+            self.emit("changed")
 
-        DataWidget.__init__(self, value,
-                            self.radio_buttons[0], "group-changed")
+    @property
+    def radio_buttons(self) -> [Gtk.RadioButton]:
+        self.__stop()
+        self.__build()
+        return self.__radio_buttons
 
     @property
     def value(self) -> int:
-        for x in self.radio_buttons:
-            if x.get_active():
-                return self.radio_buttons.index(x)
+        return self.__active
 
     @value.setter
     def value(self, value: int):
-        self.radio_buttons[value].set_active(1)
+        value = range(len(self.labels))[value]
+        if self.__radio_buttons:
+            if self.__radio_buttons[value] is None:
+                self.__add_button(value)
+            # __toggled updates the index
+            self.__radio_buttons[value].props.active = True
+        elif self.__active != value:
+            self.__active = value
+            self.emit("changed")
+    # }}}
+
+
+class ScaleMapping():
+    # {{{
+    """Maps SpinScale values to positions on its scale and back.
+The scale moves linearly through to_scale(value), so a mapping that squashes
+large values makes the scale 'accelerate' towards them.
+For a custom mapping, give to_scale and from_scale functions or subclass and
+override them. They must be each other's inverse.
+The base class is the identity."""
+    def __init__(self, to_scale: callable = None, from_scale: callable = None):
+        if to_scale is not None:
+            self.to_scale = to_scale
+        if from_scale is not None:
+            self.from_scale = from_scale
+
+    def to_scale(self, value: float) -> float:
+        return value
+
+    def from_scale(self, position: float) -> float:
+        return position
+    # }}}
+
+
+class LogMapping(ScaleMapping):
+    # {{{
+    """log(x, base), mirrored for negatives with 0 staying at 0.
+What SpinScale's logarithmic mode uses."""
+    def __init__(self, base: float = 2):
+        """Base must be > 1"""
+        assert base > 1
+        super().__init__()
+        self.base = base
+        self.__ln_base = math.log(base)
+
+    def to_scale(self, value: float) -> float:
+        if value > 0:
+            return math.log(value) / self.__ln_base
+        elif value < 0:
+            return -(math.log(-value) / self.__ln_base)
+        return 0
+
+    def from_scale(self, position: float) -> float:
+        if position > 0:
+            return math.exp(position * self.__ln_base)
+        elif position < 0:
+            return -math.exp(-position * self.__ln_base)
+        return 0
+    # }}}
+
+
+class PowerMapping(ScaleMapping):
+    # {{{
+    """x ** (1 / exponent), mirrored for negatives.
+exponent > 1 gives more of the scale to values near 0."""
+    def __init__(self, exponent: float = 2):
+        assert exponent > 0
+        super().__init__()
+        self.exponent = exponent
+        self.__root = 1 / exponent
+
+    def to_scale(self, value: float) -> float:
+        return math.copysign(abs(value) ** self.__root, value)
+
+    def from_scale(self, position: float) -> float:
+        return math.copysign(abs(position) ** self.exponent, position)
+    # }}}
+
+
+class PiecewiseMapping(ScaleMapping):
+    # {{{
+    """Linear between (value, position) points, extended past the ends by
+the outermost segments. Values and positions must both be increasing.
+PiecewiseMapping([(0, 0), (10, 0.5), (1000, 1)]) puts 0-10 on the first half
+of the scale and 10-1000 on the second."""
+    def __init__(self, points: [(float, float)]):
+        assert len(points) > 1
+        super().__init__()
+        self.values = [value for value, _ in points]
+        self.positions = [position for _, position in points]
+        # slope of each segment, position per value
+        self.__slopes = [
+            (p2 - p1) / (v2 - v1) for (v1, p1), (v2, p2) in
+            zip(points, points[1:])
+        ]
+
+    def to_scale(self, value: float) -> float:
+        n = min(max(bisect.bisect_right(self.values, value) - 1, 0),
+                len(self.__slopes) - 1)
+        return self.positions[n] + (value - self.values[n]) * self.__slopes[n]
+
+    def from_scale(self, position: float) -> float:
+        n = min(max(bisect.bisect_right(self.positions, position) - 1, 0),
+                len(self.__slopes) - 1)
+        return self.values[n] + (position - self.positions[n]) / \
+            self.__slopes[n]
     # }}}
 
 
@@ -484,9 +2577,10 @@ class SpinScale(Grid, DataWidget):
     """Widget for adjusting integers or floats.
 SpinScale() takes a Gtk.Adjustment,
 while SpinScale.new() builds a Gtk.Adjustment from values inputted.
-If logarithmic=True, the scale's adjustment will be changed
-according to log(x, log_scale). This means the scale will 'accelerate'
-as you get closer to extreme values."""
+If given a ScaleMapping, the scale moves along the mapping instead of
+linearly, while the spin button keeps the real value.
+If logarithmic=True, the mapping is a LogMapping(log_scale), meaning
+the scale will 'accelerate' as you get closer to extreme values."""
     def __init__(self,
                  adjustment: Gtk.Adjustment,
                  label: str = "",
@@ -494,8 +2588,9 @@ as you get closer to extreme values."""
                  orientation: Gtk.Orientation = Gtk.Orientation.HORIZONTAL,
                  spin_accel: float = 0.0,
                  logarithmic: bool = False,
-                 log_scale: int = 2,
+                 log_scale: float = 2,
                  scale_min_size: int = 200,
+                 mapping: ScaleMapping = None,
                  ):
         super().__init__()
 
@@ -531,8 +2626,20 @@ as you get closer to extreme values."""
         self.attach_all(direction, self.scale, self.spin_button, row=1)
 
         self.digits = digits
-        self.__log = logarithmic
         self.__log_scale = log_scale
+        self.__log_mapping = None
+        if mapping is None and logarithmic:
+            mapping = LogMapping(log_scale)
+        self.__mapping = mapping
+
+        # The scale gets its own adjustment while mapped. It's made once and
+        # reconfigured, and each adjustment has a single handler updating the
+        # other. __syncing stops those two from bouncing off each other.
+        self.__syncing = False
+        self.__scale_adjustment = Gtk.Adjustment()
+        self.__scale_adjustment.connect("value-changed", self.__scale_changed)
+        self.__watched = None
+
         self.adjustment = adjustment
         DataWidget.__init__(self, self.adjustment.props.value,
                             self.adjustment, 'value-changed')
@@ -547,6 +2654,7 @@ as you get closer to extreme values."""
         logarithmic: bool = False,
         log_scale: float = 2,
         scale_min_size: int = 200,
+        mapping: ScaleMapping = None,
     ) -> 'SpinScale':
         """Creates a new SpinScale, generating the Adjustment from vals"""
 
@@ -560,41 +2668,75 @@ as you get closer to extreme values."""
             logarithmic=logarithmic,
             log_scale=log_scale,
             scale_min_size=scale_min_size,
+            mapping=mapping,
         )
 
-    def set_main_from_log(self, *args):
-        """Internal function runs when a logarithmic scale is changed,
-to update the spin button."""
-        if self.logarithmic:
+    def __configure_scale(self, *args):
+        """Points the scale at the right adjustment, mapping the main
+adjustment's bounds onto the scale's if there's a mapping."""
+        adjustment = self.adjustment
+        if self.__mapping is None:
+            self.scale.props.adjustment = adjustment
+            return
+
+        to_scale = self.__mapping.to_scale
+        lower = to_scale(adjustment.props.lower)
+        upper = to_scale(adjustment.props.upper)
+        span = adjustment.props.upper - adjustment.props.lower
+        # increments keep the same fraction of the whole range
+        ratio = (upper - lower) / span if span else 0
+
+        self.__syncing = True
+        try:
+            self.__scale_adjustment.configure(
+                to_scale(adjustment.props.value), lower, upper,
+                adjustment.props.step_increment * ratio,
+                adjustment.props.page_increment * ratio,
+                adjustment.props.page_size * ratio,
+            )
+        finally:
+            self.__syncing = False
+        self.scale.props.adjustment = self.__scale_adjustment
+
+    def __scale_changed(self, scale_adjustment: Gtk.Adjustment):
+        if self.__syncing or self.__mapping is None:
+            return
+        self.__syncing = True
+        try:
             self.adjustment.props.value = \
-                self.smart_unlog(self.scale.props.adjustment.props.value)
-
-    def set_log_from_main(self, *args):
-        """Internal function runs when a spin button is changed,
-to update the logarithmic scale."""
-        if self.logarithmic:
-            self.scale.props.adjustment.props.value = \
-                self.smart_log(self.adjustment.props.value)
+                self.__mapping.from_scale(scale_adjustment.props.value)
+        finally:
+            self.__syncing = False
+
+    def __value_changed(self, adjustment: Gtk.Adjustment):
+        if self.__syncing or self.__mapping is None:
+            return
+        self.__syncing = True
+        try:
+            self.__scale_adjustment.props.value = \
+                self.__mapping.to_scale(adjustment.props.value)
+        finally:
+            self.__syncing = False
 
     def smart_log(self, value: float) -> float:
-        """Internal function that returns a value 'smartly' logarithmicized,
-accounting for negatives and 0"""
-        if value > 0:
-            return math.log(value, self.log_scale)
-        elif value == 0:
-            return 0
-        elif value < 0:
-            return -(math.log(abs(value), self.log_scale))
+        """Returns a value 'smartly' logarithmicized,
+accounting for negatives and 0. See LogMapping"""
+        return self.__log().to_scale(value)
 
     def smart_unlog(self, value: float) -> float:
-        """Internal function that returns a logarithmicized value 'smartly'
-de-logarithmicized, accounting for negatives and 0"""
-        if value > 0:
-            return self.log_scale ** value
-        elif value == 0:
-            return 0
-        elif value < 0:
-            return -(self.log_scale ** abs(value))
+        """Returns a logarithmicized value 'smartly'
+de-logarithmicized, accounting for negatives and 0. See LogMapping"""
+        return self.__log().from_scale(value)
+
+    def __log(self) -> LogMapping:
+        """LogMapping for log_scale, the current mapping if it is one."""
+        if isinstance(self.__mapping, LogMapping) \
+                and self.__mapping.base == self.__log_scale:
+            return self.__mapping
+        if self.__log_mapping is None \
+                or self.__log_mapping.base != self.__log_scale:
+            self.__log_mapping = LogMapping(self.__log_scale)
+        return self.__log_mapping
 
     @property
     def adjustment(self) -> Gtk.Adjustment:
@@ -602,9 +2744,17 @@ de-logarithmicized, accounting for negatives and 0"""
 
     @adjustment.setter
     def adjustment(self, adjustment: Gtk.Adjustment):
+        if self.__watched is not None:
+            old, handlers = self.__watched
+            for handler in handlers:
+                old.disconnect(handler)
         self.spin_button.props.adjustment = adjustment
+        self.__watched = (adjustment, [
+            adjustment.connect("value-changed", self.__value_changed),
+            adjustment.connect("changed", self.__configure_scale),
+        ])
         self.reset_value = adjustment.props.value
-        self.logarithmic = self.logarithmic  # sets scale adj
+        self.__configure_scale()
 
     @property
     def digits(self) -> int:
@@ -615,29 +2765,26 @@ de-logarithmicized, accounting for negatives and 0"""
         self.spin_button.props.digits = digits
         self.scale.props.digits = digits
 
+    @property
+    def mapping(self) -> ScaleMapping:
+        """ScaleMapping the scale moves along, or None for linear."""
+        return self.__mapping
+
+    @mapping.setter
+    def mapping(self, mapping: ScaleMapping):
+        self.__mapping = mapping
+        self.__configure_scale()
+
     @property
     def logarithmic(self) -> bool:
-        return self.__log
+        return isinstance(self.__mapping, LogMapping)
 
     @logarithmic.setter
     def logarithmic(self, value: bool):
-        self.__log = value
         if value:
-            self.__log_adj = Gtk.Adjustment.new(
-                value=self.smart_log(self.adjustment.props.value),
-                lower=self.smart_log(self.adjustment.props.lower),
-                upper=self.smart_log(self.adjustment.props.upper),
-                step_increment=self.smart_log(
-                    self.adjustment.props.step_increment),
-                page_increment=self.smart_log(
-                    self.adjustment.props.page_increment),
-                page_size=self.smart_log(self.adjustment.props.page_size),
-            )
-            self.__log_adj.connect("value-changed", self.set_main_from_log)
-            self.adjustment.connect("value-changed", self.set_log_from_main)
-            self.scale.props.adjustment = self.__log_adj
-        else:
-            self.scale.props.adjustment = self.adjustment
+            self.mapping = self.__log()
+        elif self.logarithmic:
+            self.mapping = None
 
     @property
     def log_scale(self) -> float:
@@ -660,8 +2807,1230 @@ de-logarithmicized, accounting for negatives and 0"""
 
     @value.setter
     def value(self, value: float):
+        # the scale follows through __value_changed
         self.adjustment.props.value = value
-        if self.logarithmic:
-            self.scale.props.adjustment.props.value = \
-                math.log(value, self.log_scale)
+    # }}}
+
+
+class Table(Grid, DataWidget):
+    # {{{
+    """Scrollable table over columnar data, for anything from a few rows to
+millions. columns is {title: column} of equal length sequences or 1D NumPy
+arrays, read through a SequenceModel without being copied.
+GTK only ever gets a window of rows the height of the view: the model's rows
+are the ones at the position of Table's own scrollbar, so the TreeView never
+walks the whole table, however long it is.
+
+Clicking a header sorts by it. Sorting and filtering never move the data,
+they only change which rows are in view and in what order: an argsort
+permutation cached per column, narrowed down by a boolean mask from filter(),
+vectorized with NumPy arrays.
+table.filter(table.columns["size"] > 100)
+Call refresh() after changing the data in place.
+
+value is the selected rows as sorted indices into the data. Ctrl or Shift
+clicks add to a selection made elsewhere in the table, other clicks and
+keys replace it.
+multiple: allow selecting more than one row."""
+    __gsignals__ = {"changed": (GObject.SignalFlags.RUN_FIRST, None, ())}
+
+    def __init__(self, columns: {str: collections.abc.Sequence},
+                 value: [int] = (), label: str = "", multiple: bool = True,
+                 column_width: int = 100, min_width: int = 400,
+                 min_height: int = 300):
+        assert columns
+        super().__init__()
+
+        if label:
+            self.label = Gtk.Label.new(label)
+            self.attach(self.label, 0, 0, 2, 1)
+
+        self.columns = dict(columns)
+        self.model = SequenceModel(*self.columns.values())
+        # empty until the view's height is known
+        self.model.rows = range(0)
+        self.tree_view = Gtk.TreeView.new_with_model(self.model)
+        self.tree_view_columns = {}
+        for num, title in enumerate(self.columns):
+            self.__renderer = Gtk.CellRendererText()
+            column = Gtk.TreeViewColumn(title, self.__renderer, text=num)
+            # fixed_height_mode needs every column fixed
+            column.props.sizing = Gtk.TreeViewColumnSizing.FIXED
+            column.props.fixed_width = column_width
+            column.props.resizable = True
+            column.props.clickable = True
+            column.connect("clicked", self.__header_clicked, title)
+            self.tree_view.append_column(column)
+            self.tree_view_columns[title] = column
+        self.tree_view.props.fixed_height_mode = True
+        self.tree_view.add_events(Gdk.EventMask.SCROLL_MASK
+                                  | Gdk.EventMask.SMOOTH_SCROLL_MASK)
+        self.tree_view.connect("scroll-event", self.__scroll)
+        self.tree_view.connect("key-press-event", self.__key)
+
+        self.selection = self.tree_view.get_selection()
+        self.selection.props.mode = Gtk.SelectionMode.MULTIPLE if multiple \
+            else Gtk.SelectionMode.SINGLE
+        self.__selecting = False
+        self.__selected = set()
+        self.selection.connect("changed", self.__selection_changed)
+
+        # scrolls sideways only, rows are scrolled by swapping the window
+        self.scrolled_window = Gtk.ScrolledWindow.new(None, None)
+        self.scrolled_window.props.vscrollbar_policy = \
+            Gtk.PolicyType.EXTERNAL
+        self.scrolled_window.props.expand = True
+        self.scrolled_window.props.min_content_width = min_width
+        self.scrolled_window.props.min_content_height = min_height
+        self.scrolled_window.add(self.tree_view)
+        self.tree_view.get_vadjustment().connect("changed", self.__resized)
+        self.attach(self.scrolled_window, 0, 1, 1, 1)
+
+        # in rows of the whole table
+        self.vadjustment = Gtk.Adjustment.new(0, 0, 0, 1, 1, 1)
+        self.vadjustment.connect("value-changed", self.__show)
+        self.attach(Gtk.Scrollbar.new(Gtk.Orientation.VERTICAL,
+                                      self.vadjustment), 1, 1, 1, 1)
+
+        self.__page = 0
+        self.__resize_source = None
+        self.__orders = {}
+        self.__sort = None
+        self.__descending = False
+        self.__mask = None
+        self.__view = None
+        DataWidget.__init__(self, list(value), self, "changed")
+
+    def __count(self) -> int:
+        """Number of rows in view, after filtering."""
+        return len(self.columns[next(iter(self.columns))]) \
+            if self.__view is None else len(self.__view)
+
+    def __order(self, title: str):
+        """Ascending argsort of a column, cached."""
+        order = self.__orders.get(title)
+        if order is None:
+            column = self.columns[title]
+            if numpy is not None and isinstance(column, numpy.ndarray):
+                order = numpy.argsort(column, kind="stable")
+            else:
+                order = sorted(range(len(column)), key=column.__getitem__)
+                if numpy is not None:
+                    order = numpy.array(order, numpy.intp)
+            self.__orders[title] = order
+        return order
+
+    def __rows(self) -> collections.abc.Sequence:
+        """The rows to show, or None for all of them in data order."""
+        rows = None
+        if self.__sort is not None:
+            rows = self.__order(self.__sort)
+            if self.__descending:
+                rows = rows[::-1]
+        if self.__mask is None:
+            return rows
+        elif numpy is not None:
+            mask = numpy.asarray(self.__mask, bool)
+            return numpy.flatnonzero(mask) if rows is None else \
+                rows[mask[rows]]
+        elif rows is None:
+            return [row for row, keep in enumerate(self.__mask) if keep]
+        return [row for row in rows if self.__mask[row]]
+
+    def __row_height(self) -> int:
+        if len(self.model):
+            height = self.tree_view.get_background_area(
+                Gtk.TreePath.new_first(), None
+            ).height
+            if height > 0:
+                return height
+        return max(1, self.__renderer.get_preferred_height(
+            self.tree_view
+        )[1])
+
+    def __resized(self, *args):
+        # the view's height changed, which happens mid-allocation
+        if self.__resize_source is None:
+            self.__resize_source = GLib.idle_add(self.__resize)
+
+    def __resize(self) -> bool:
+        self.__resize_source = None
+        height = self.tree_view.get_vadjustment().props.page_size
+        for attempt in range(2):
+            row_height = self.__row_height()
+            # the model includes a partly visible last row, scrolling
+            # only has to go far enough to show it whole
+            self.__page = max(1, math.ceil(height / row_height))
+            self.__configure(max(1, int(height // row_height)))
+            # measured again once there are real rows to measure
+            if row_height == self.__row_height():
+                break
+        return False
+
+    def __configure(self, page_size: int = None):
+        adjustment = self.vadjustment
+        if page_size is None:
+            page_size = adjustment.props.page_size
+        adjustment.configure(adjustment.props.value, 0, self.__count(),
+                             1, max(1, page_size - 1), page_size)
+        self.__show()
+
+    def __show(self, *args):
+        """Points the model at the rows from the scrollbar's position on,
+telling the view only about the rows in the window."""
+        offset = max(0, int(self.vadjustment.props.value))
+        end = min(self.__count(), offset + self.__page)
+        window = range(offset, end) if self.__view is None \
+            else self.__view[offset:end]
+
+        model = self.model
+        # deleting a selected row makes GTK report a selection change,
+        # which would be read through the new window
+        self.__selecting = True
+        try:
+            old = len(model)
+            model.rows = window
+            new = len(model)
+            for row in reversed(range(new, old)):
+                model.row_deleted(Gtk.TreePath.new_from_indices([row]))
+            for row in range(new):
+                path = Gtk.TreePath.new_from_indices([row])
+                if row < old:
+                    model.row_changed(path, model.get_iter(path))
+                else:
+                    model.row_inserted(path, model.get_iter(path))
+
+            self.selection.unselect_all()
+            if self.__selected:
+                for row, data_row in enumerate(window):
+                    if int(data_row) in self.__selected:
+                        self.selection.select_path(
+                            Gtk.TreePath.new_from_indices([row])
+                        )
+        finally:
+            self.__selecting = False
+
+    def __apply(self):
+        """Puts the current sort and filter in view, back at the top."""
+        self.__view = self.__rows()
+        for title, column in self.tree_view_columns.items():
+            column.props.sort_indicator = title == self.__sort
+            column.props.sort_order = Gtk.SortType.DESCENDING \
+                if self.__descending else Gtk.SortType.ASCENDING
+        self.vadjustment.props.value = 0
+        self.__configure()
+
+    def __scroll(self, widget: Gtk.TreeView, event: Gdk.EventScroll) -> bool:
+        smooth, dx, dy = event.get_scroll_deltas()
+        if not smooth:
+            dy = {Gdk.ScrollDirection.UP: -1,
+                  Gdk.ScrollDirection.DOWN: 1}.get(event.direction, 0)
+        if not dy:
+            return False
+        # adjustments clamp the value themselves
+        self.vadjustment.props.value += dy * 3
+        return True
+
+    def __key(self, widget: Gtk.TreeView, event: Gdk.EventKey) -> bool:
+        page = int(self.vadjustment.props.page_size)
+        delta = {
+            Gdk.KEY_Up: -1, Gdk.KEY_Down: 1,
+            Gdk.KEY_Page_Up: -page, Gdk.KEY_Page_Down: page,
+            Gdk.KEY_Home: -self.__count(), Gdk.KEY_End: self.__count(),
+        }.get(event.keyval)
+        if delta is None or not self.__count():
+            return False
+        path = self.tree_view.get_cursor()[0]
+        offset = int(self.vadjustment.props.value)
+        target = offset + (path.get_indices()[0] if path else 0) + delta
+        target = min(max(target, 0), self.__count() - 1)
+        # scroll just far enough to bring target into view
+        if target < offset:
+            self.vadjustment.props.value = target
+        elif target >= offset + page:
+            self.vadjustment.props.value = target - page + 1
+        self.tree_view.set_cursor(Gtk.TreePath.new_from_indices(
+            [target - int(self.vadjustment.props.value)]
+        ), None, False)
+        return True
+
+    def __header_clicked(self, column: Gtk.TreeViewColumn, title: str):
+        if self.__sort == title:
+            self.sort(title, not self.__descending)
+        else:
+            self.sort(title)
+
+    def __selection_changed(self, selection: Gtk.TreeSelection):
+        if self.__selecting:
+            return
+        window = self.model.rows
+        selected = {int(window[path.get_indices()[0]])
+                    for path in selection.get_selected_rows()[1]}
+        event = Gtk.get_current_event()
+        if event is not None \
+                and selection.props.mode == Gtk.SelectionMode.MULTIPLE \
+                and event.get_state()[1] & (Gdk.ModifierType.CONTROL_MASK
+                                            | Gdk.ModifierType.SHIFT_MASK):
+            # added to or taken from, rows out of view stay as they were
+            self.__selected.difference_update(int(row) for row in window)
+            self.__selected |= selected
+        else:
+            self.__selected = selected
+        self.emit("changed")
+
+    def sort(self, title: str = None, descending: bool = False):
+        """Sorts by the column titled title, or goes back to data order if
+None."""
+        self.__sort = title
+        self.__descending = descending
+        self.__apply()
+
+    def filter(self, mask: collections.abc.Sequence = None):
+        """Only shows rows where mask, a sequence of bools as long as the
+data, is True. None shows every row. Selected rows filtered out are
+unselected."""
+        self.__mask = mask
+        if mask is not None and self.__selected:
+            kept = {row for row in self.__selected if mask[row]}
+            if kept != self.__selected:
+                self.__selected = kept
+                self.emit("changed")
+        self.__apply()
+
+    def refresh(self):
+        """Drops the cached sort orders and redraws,
+for after the data was changed in place."""
+        self.__orders.clear()
+        self.__apply()
+
+    @property
+    def sorted_by(self) -> (str, bool):
+        """Title of the sorting column, or None, and whether descending."""
+        return self.__sort, self.__descending
+
+    @property
+    def value(self) -> [int]:
+        return sorted(self.__selected)
+
+    @value.setter
+    def value(self, value: [int]):
+        value = set(value)
+        if value != self.__selected:
+            self.__selected = value
+            self.__show()
+            self.emit("changed")
+    # }}}
+
+
+# ### FORMS ### #
+
+
+def _same(a, b) -> bool:
+    """a == b, for values of any DataWidget. Image and Plot values are NumPy
+arrays, whose == is elementwise and can't be used as a bool."""
+    if a is b:
+        return True
+    if numpy is not None and (isinstance(a, numpy.ndarray) or
+                              isinstance(b, numpy.ndarray)):
+        return numpy.array_equal(a, b)
+    return a == b
+
+
+class Batch():
+    # {{{
+    """Context manager holding back the connect_changed handlers of a set of
+DataWidgets, for bulk value changes like resetting a form or loading a preset.
+Handlers don't run for changes made inside the batch. Instead, on exit,
+callback is called once with the list of widgets whose value differs from
+when the batch started, if there are any. That list is also kept in changed.
+
+with bszgw.Batch(widgets, recompute):
+    for widget in widgets:
+        widget.reset()"""
+    def __init__(self, widgets: [DataWidget], callback: callable = None):
+        self.widgets = list(widgets)
+        self.callback = callback
+        self.changed = []
+        self.__before = []
+        self.__blocked = []
+
+    def __enter__(self) -> 'Batch':
+        self.__before = [widget.value for widget in self.widgets]
+        self.__blocked = [(widget.value_widget, list(widget.changed_handlers))
+                          for widget in self.widgets]
+        for value_widget, handlers in self.__blocked:
+            for handler in handlers:
+                value_widget.handler_block(handler)
+        return self
+
+    def __exit__(self, *exception) -> bool:
+        for value_widget, handlers in self.__blocked:
+            for handler in handlers:
+                value_widget.handler_unblock(handler)
+        self.__blocked = []
+
+        self.changed = [
+            widget for widget, before in zip(self.widgets, self.__before)
+            if not _same(widget.value, before)
+        ]
+        self.__before = []
+        if self.changed and self.callback is not None:
+            self.callback(self.changed)
+        return False
+    # }}}
+
+
+class Form():
+    # {{{
+    """Named DataWidgets whose values can be read all at once.
+Values are cached and a widget is only read again after its value signal
+fires, so taking repeated snapshots of a mostly unchanged form is cheap.
+
+Form({"gain": spin_scale, "mode": combo_box})
+Form.from_container() builds one out of a finished AutoBox or Grid layout."""
+    def __init__(self, widgets: {str: DataWidget}):
+        self.widgets = dict(widgets)
+        self.__cache = {}
+        self.__snapshot = None
+        self.__dirty = set(self.widgets)
+        for name, widget in self.widgets.items():
+            # connected directly so a Batch doesn't hold it back
+            widget.value_widget.connect(widget.value_signal,
+                                        self.__changed, name)
+
+    def from_container(container: Gtk.Container) -> 'Form':
+        """Creates a Form from every DataWidget inside container.
+Widgets are named by set_name(), or failing that by their label text.
+Ones with neither are left out."""
+        widgets = {}
+
+        def walk(widget: Gtk.Widget):
+            if isinstance(widget, DataWidget):
+                name = widget.get_name()
+                if name == type(widget).__gtype__.name:
+                    # never set, fall back to the label
+                    label = getattr(widget, "label", None)
+                    if isinstance(label, Gtk.Label):
+                        name = label.props.label
+                    elif isinstance(widget, Gtk.Button):
+                        name = widget.props.label
+                    else:
+                        name = None
+                if name:
+                    if name in widgets:
+                        raise ValueError(f"Duplicate DataWidget name {name}")
+                    widgets[name] = widget
+                    return
+            if isinstance(widget, Gtk.Container):
+                for child in widget.get_children():
+                    walk(child)
+
+        walk(container)
+        return Form(widgets)
+
+    def __changed(self, *args):
+        self.__dirty.add(args[-1])
+
+    def __getitem__(self, name: str) -> DataWidget:
+        return self.widgets[name]
+
+    @property
+    def dirty(self) -> {str}:
+        """Names of widgets changed since the last snapshot."""
+        return set(self.__dirty)
+
+    def snapshot(self) -> types.MappingProxyType:
+        """Returns a read-only {name: value} of the whole form.
+Only widgets that changed since the last call are read. If none did, the
+previous snapshot itself is returned, so `is` tells if anything changed."""
+        if self.__dirty or self.__snapshot is None:
+            for name in self.__dirty:
+                self.__cache[name] = self.widgets[name].value
+            self.__dirty.clear()
+            self.__snapshot = types.MappingProxyType(dict(self.__cache))
+        return self.__snapshot
+
+    def values(self) -> {str: object}:
+        """Returns a fresh dict of every value."""
+        return dict(self.snapshot())
+
+    def diff(self, old: {str: object},
+             new: {str: object} = None) -> {str: (object, object)}:
+        """Returns {name: (old value, new value)} for every value differing
+between two snapshots. new defaults to a current snapshot."""
+        if new is None:
+            new = self.snapshot()
+        return {name: (old.get(name), value) for name, value in new.items()
+                if name not in old or not _same(old[name], value)}
+
+    def batch(self, callback: callable = None) -> Batch:
+        """Returns a Batch over every widget in the form."""
+        return Batch(self.widgets.values(), callback)
+
+    def set_values(self, values: {str: object}, callback: callable = None):
+        """Sets many values in one Batch. Unknown names are ignored."""
+        with self.batch(callback):
+            for name, value in values.items():
+                if name in self.widgets:
+                    self.widgets[name].value = value
+
+    def reset(self, callback: callable = None):
+        """Resets every widget in one Batch."""
+        with self.batch(callback):
+            for widget in self.widgets.values():
+                widget.reset()
+    # }}}
+
+
+class Journal():
+    # {{{
+    """Saves a Form's values to a file as they change, to be restored on the
+next run. Only changed values are appended, one JSON object per line, once
+changes have settled for delay ms. After compact appends, or once the file
+grows past compact_bytes or twice its last rewritten size, whichever is
+larger, it is rewritten as a single line holding the whole form.
+Values must be JSON serializable. A dict of DataWidgets works as the form too.
+
+journal = bszgw.Journal("~/.cache/my_tool.jsonl", form)
+journal.restore()
+app.launch()"""
+    def __init__(self, path: str, form: Form,
+                 delay: int = 500, compact: int = 100,
+                 compact_bytes: int = 1 << 20):
+        if not isinstance(form, Form):
+            form = Form(form)
+        self.path = os.path.expanduser(path)
+        self.form = form
+        self.delay = delay
+        self.compact = compact
+        self.compact_bytes = compact_bytes
+        # lines and bytes already in the file, so compaction counts them too
+        self.__lines = 0
+        self.__size = 0
+        # size of the last rewrite, so a form bigger than compact_bytes
+        # isn't rewritten on every flush
+        self.__base = 0
+        try:
+            with open(self.path, "rb") as file:
+                self.__lines = sum(1 for line in file)
+                self.__size = file.tell()
+        except FileNotFoundError:
+            pass
+        self.__pending = set()
+        self.__source = None
+        self.__restoring = False
+        for name, widget in form.widgets.items():
+            widget.value_widget.connect(widget.value_signal,
+                                        self.__changed, name)
+            # write out the last changes while the widgets are still alive
+            if isinstance(widget, Gtk.Widget):
+                widget.connect("destroy", self.flush)
+
+    def __changed(self, *args):
+        if self.__restoring:
+            return
+        self.__pending.add(args[-1])
+        if self.__source is not None:
+            GLib.source_remove(self.__source)
+        self.__source = GLib.timeout_add(self.delay, self.flush)
+
+    def read(self) -> {str: object}:
+        """Returns the values saved in the journal, or {} if there's none.
+A torn last line, from being killed mid-write, is skipped."""
+        values = {}
+        self.__lines = 0
+        try:
+            with open(self.path) as file:
+                for line in file:
+                    try:
+                        values.update(json.loads(line))
+                    except ValueError:
+                        continue
+                    self.__lines += 1
+        except FileNotFoundError:
+            pass
+        return values
+
+    def restore(self) -> {str: object}:
+        """Applies the saved values to the form, without any connect_changed
+handlers running. Meant for before App.launch().
+Values the widgets no longer accept, like an index past the end of changed
+RadioButtons, are skipped with a warning on stderr.
+Returns the values that were applied."""
+        restored = {}
+        self.__restoring = True
+        try:
+            with self.form.batch():
+                for name, value in self.read().items():
+                    widget = self.form.widgets.get(name)
+                    if widget is None:
+                        continue
+                    try:
+                        widget.value = value
+                    except Exception as error:
+                        print(f"bszgw: couldn't restore {name} from "
+                              f"{self.path}: {error!r}", file=sys.stderr)
+                        continue
+                    restored[name] = value
+        finally:
+            self.__restoring = False
+        return restored
+
+    def flush(self, *args) -> bool:
+        """Appends pending changes to the journal right away."""
+        if self.__source is not None:
+            GLib.source_remove(self.__source)
+            self.__source = None
+        if not self.__pending:
+            return False
+
+        if self.__lines >= self.compact or \
+                self.__size >= max(self.compact_bytes, 2 * self.__base):
+            self.__pending.clear()
+            self.rewrite()
+            return False
+        values = {name: self.form.widgets[name].value
+                  for name in self.__pending}
+        self.__pending.clear()
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        line = json.dumps(values) + "\n"
+        with open(self.path, "a") as file:
+            file.write(line)
+        self.__lines += 1
+        # json.dumps escapes to ASCII, so characters are bytes
+        self.__size += len(line)
+        return False
+
+    def rewrite(self):
+        """Replaces the journal with one line holding the whole form."""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp = self.path + ".tmp"
+        line = json.dumps(self.form.values()) + "\n"
+        with open(temp, "w") as file:
+            file.write(line)
+        os.replace(temp, self.path)
+        self.__lines = 1
+        self.__size = self.__base = len(line)
+    # }}}
+
+
+class History():
+    # {{{
+    """Undo and redo across a Form.
+Steps are kept in a ring of at most limit, each holding a single widget's
+old and new value. Changes to the same widget less than merge seconds apart
+join the previous step, so a SpinScale drag or a typed word is undone at
+once. Multi-line Entry edits are kept as the text inserted or deleted and
+its offset rather than copies of the buffer.
+A dict of DataWidgets works as the form too."""
+    def __init__(self, form: Form, limit: int = 100, merge: float = 0.5):
+        if not isinstance(form, Form):
+            form = Form(form)
+        self.form = form
+        self.merge = merge
+        # [kind, name, old value or offset, new value or text, time]
+        self.__undo = collections.deque(maxlen=limit)
+        self.__redo = []
+        self.__values = {}
+        self.__applying = False
+
+        for name, widget in form.widgets.items():
+            if isinstance(widget, Entry) and \
+                    isinstance(widget.text_buffer, Gtk.TextBuffer):
+                # default handlers run last, so the edit hasn't happened yet
+                widget.text_buffer.connect("insert-text",
+                                           self.__inserted, name)
+                widget.text_buffer.connect("delete-range",
+                                           self.__deleted, name)
+            else:
+                self.__values[name] = widget.value
+                widget.value_widget.connect(widget.value_signal,
+                                            self.__changed, name)
+
+    def __record(self, kind: str, name: str, a, b):
+        now = time.monotonic()
+        self.__redo.clear()
+        top = self.__undo[-1] if self.__undo else None
+        if top is not None and top[:2] == [kind, name] and \
+                now - top[4] < self.merge:
+            if kind == "value":
+                top[3] = b
+                top[4] = now
+                return
+            elif kind == "insert" and a == top[2] + len(top[3]):
+                top[3] += b
+                top[4] = now
+                return
+            elif kind == "delete" and a + len(b) == top[2]:
+                # backspacing
+                top[2] = a
+                top[3] = b + top[3]
+                top[4] = now
+                return
+            elif kind == "delete" and a == top[2]:
+                top[3] += b
+                top[4] = now
+                return
+        self.__undo.append([kind, name, a, b, now])
+
+    def __changed(self, *args):
+        name = args[-1]
+        if self.__applying:
+            return
+        old = self.__values[name]
+        new = self.__values[name] = self.form.widgets[name].value
+        if not _same(old, new):
+            self.__record("value", name, old, new)
+
+    def __inserted(self, buffer: Gtk.TextBuffer, location: Gtk.TextIter,
+                   text: str, length: int, name: str):
+        if not self.__applying:
+            self.__record("insert", name, location.get_offset(), text)
+
+    def __deleted(self, buffer: Gtk.TextBuffer, start: Gtk.TextIter,
+                  end: Gtk.TextIter, name: str):
+        if not self.__applying:
+            self.__record("delete", name, start.get_offset(),
+                          buffer.get_text(start, end, True))
+
+    def __apply(self, step: list, undo: bool):
+        kind, name, a, b, _ = step
+        widget = self.form.widgets[name]
+        self.__applying = True
+        try:
+            if kind == "value":
+                widget.value = a if undo else b
+                self.__values[name] = widget.value
+            elif (kind == "insert") == undo:
+                buffer = widget.text_buffer
+                buffer.delete(buffer.get_iter_at_offset(a),
+                              buffer.get_iter_at_offset(a + len(b)))
+            else:
+                buffer = widget.text_buffer
+                buffer.insert(buffer.get_iter_at_offset(a), b)
+        finally:
+            self.__applying = False
+
+    @property
+    def can_undo(self) -> bool:
+        return bool(self.__undo)
+
+    @property
+    def can_redo(self) -> bool:
+        return bool(self.__redo)
+
+    def undo(self) -> bool:
+        """Reverts the latest step. Returns False if there was none."""
+        if not self.__undo:
+            return False
+        step = self.__undo.pop()
+        self.__apply(step, True)
+        self.__redo.append(step)
+        if self.__undo:
+            self.__undo[-1][4] = -math.inf
+        return True
+
+    def redo(self) -> bool:
+        """Reapplies the last undone step. Returns False if there was none."""
+        if not self.__redo:
+            return False
+        step = self.__redo.pop()
+        self.__apply(step, False)
+        # steps that have been moved around shouldn't swallow new changes
+        step[4] = -math.inf
+        self.__undo.append(step)
+        return True
+
+    def clear(self):
+        self.__undo.clear()
+        self.__redo.clear()
+    # }}}
+
+
+# ### LOADING ### #
+
+
+class Populator():
+    # {{{
+    """Feeds items from an iterable into a widget or model a chunk at a time
+from the GLib main loop, so big or slow sources show up progressively instead
+of freezing the window until they're done.
+Each idle callback adds items until budget ms have passed, leaving the rest
+of the frame to GTK. It starts right away, cancel() stops it.
+
+target: a callable taking each item, or one of
+  ComboBox, Gtk.ListStore, SequenceModel - item is a row or a single value
+  RadioButtons - item is a label
+  Grid - item is a widget or GridChild, attached downwards
+progress: called with the number of items added so far after each chunk.
+done: called with the total once the iterable is exhausted."""
+    def __init__(self, iterable: collections.abc.Iterable, target,
+                 budget: float = 4, progress: callable = None,
+                 done: callable = None):
+        self.budget = budget
+        self.progress = progress
+        self.done = done
+        self.count = 0
+        self.finished = False
+        self.__iterator = iter(iterable)
+        self.__add = self.__adder(target)
+        self.__row = 0
+        self.__source = GLib.idle_add(self.__step)
+
+    def __adder(self, target) -> callable:
+        if isinstance(target, ComboBox):
+            target = target.props.model
+        if isinstance(target, (Gtk.ListStore, SequenceModel)):
+            return lambda item: target.append(
+                item if isinstance(item, (list, tuple)) else [item]
+            )
+        elif isinstance(target, RadioButtons):
+            return target.append
+        elif isinstance(target, Grid):
+            return functools.partial(self.__attach, target)
+        elif callable(target):
+            return target
+        raise TypeError(f"Can't populate {target}")
+
+    def __attach(self, grid: Grid, item):
+        # carry on below the last item instead of searching from the top
+        grid.attach_all_down(item, row=self.__row)
+        widget = item.widget if isinstance(item, GridChild) else item
+        self.__row = grid.child_get_property(widget, "top-attach") + 1
+
+    def __step(self) -> bool:
+        deadline = time.perf_counter() + self.budget / 1000
+        try:
+            while True:
+                self.__add(next(self.__iterator))
+                self.count += 1
+                if time.perf_counter() >= deadline:
+                    break
+        except StopIteration:
+            self.__source = None
+            self.finished = True
+            if self.progress:
+                self.progress(self.count)
+            if self.done:
+                self.done(self.count)
+            return False
+
+        if self.progress:
+            self.progress(self.count)
+        return True
+
+    def cancel(self):
+        """Stops adding items. Ones already added stay."""
+        if self.__source is not None:
+            GLib.source_remove(self.__source)
+            self.__source = None
+    # }}}
+
+
+# ### RECYCLING ### #
+
+
+class WidgetPool():
+    # {{{
+    """Keeps released DataWidgets to hand out again instead of building new
+ones, for panels that are torn down and rebuilt often.
+The methods match the constructors they stand in for. Widgets are pooled by
+the settings that shape what they're built from, like having a label or
+being multi-line, and everything else is set again through their properties
+on reuse. A reused SpinScale keeps its Gtk.Adjustment, reconfigured.
+
+release() or release_all() the widgets before destroying whatever held them.
+Releasing disconnects their connect_changed handlers. Anything else connected
+to them, like a Form, should be thrown away along with the old panel.
+
+limit: how many free widgets to keep for each set of settings.
+built and reused count how widgets were handed out."""
+    def __init__(self, limit: int = 32):
+        self.limit = limit
+        self.built = 0
+        self.reused = 0
+        self.__free = {}
+        self.__keys = weakref.WeakKeyDictionary()
+
+    def __take(self, key: tuple) -> DataWidget:
+        free = self.__free.get(key)
+        if free:
+            self.reused += 1
+            widget = free.pop()
+            self.__keys[widget] = key
+            return widget
+        return None
+
+    def __built(self, key: tuple, widget: DataWidget) -> DataWidget:
+        self.built += 1
+        self.__keys[widget] = key
+        return widget
+
+    def check_button(self, label: str, value: bool) -> CheckButton:
+        """CheckButton(label, value)"""
+        key = (CheckButton,)
+        widget = self.__take(key)
+        if widget is None:
+            return self.__built(key, CheckButton(label, value))
+        widget.props.label = label
+        widget.value = value
+        widget.reset_value = value
+        return widget
+
+    def combo_box(self, items: collections.abc.Sequence, value,
+                  show_ids: bool = True, wrap: int = 0) -> ComboBox:
+        """ComboBox.new_lazy(items, value, show_ids, wrap)
+Reuse swaps in a new SequenceModel, which doesn't copy a sequence."""
+        mapping = isinstance(items, collections.abc.Mapping)
+        key = (ComboBox, mapping, mapping and show_ids)
+        widget = self.__take(key)
+        if widget is None:
+            return self.__built(
+                key, ComboBox.new_lazy(items, value, show_ids, wrap)
+            )
+        widget.typeahead = False
+        widget.props.wrap_width = wrap
+        if mapping:
+            widget.props.model = SequenceModel(list(items),
+                                               list(items.values()))
+        else:
+            widget.props.model = SequenceModel(items)
+        widget.value = value
+        widget.reset_value = value
+        return widget
+
+    def entry(self, value: str, label: str = "", multi_line: bool = False,
+              min_width: int = 200, min_height: int = 100,
+              max_lines: int = 0, max_chars: int = 0) -> Entry:
+        """Entry(value, label, multi_line, min_width, min_height,
+max_lines, max_chars)"""
+        key = (Entry, bool(label), multi_line)
+        widget = self.__take(key)
+        if widget is None:
+            return self.__built(key, Entry(
+                value, label, multi_line, min_width, min_height,
+                max_lines, max_chars
+            ))
+        if label:
+            widget.label.props.label = label
+        widget.min_width = min_width
+        widget.min_height = min_height
+        widget.max_lines = max_lines
+        widget.max_chars = max_chars
+        widget.value = value
+        widget.reset_value = value
+        return widget
+
+    def spin_scale(
+        self,
+        value: float, min_value: float, max_value: float,
+        step_increment: float, page_increment: float,
+        label: str = "",
+        digits: int = 0,
+        orientation: Gtk.Orientation = Gtk.Orientation.HORIZONTAL,
+        spin_accel: float = 0.0,
+        logarithmic: bool = False,
+        log_scale: float = 2,
+        scale_min_size: int = 200,
+        mapping: ScaleMapping = None,
+    ) -> SpinScale:
+        """SpinScale.new() with the same arguments"""
+        key = (SpinScale, bool(label), orientation, scale_min_size)
+        widget = self.__take(key)
+        if widget is None:
+            return self.__built(key, SpinScale.new(
+                value, min_value, max_value, step_increment, page_increment,
+                label, digits, orientation, spin_accel, logarithmic,
+                log_scale, scale_min_size, mapping
+            ))
+        if label:
+            widget.label.props.label = label
+        widget.spin_button.props.climb_rate = spin_accel
+        widget.digits = digits
+        widget.adjustment.configure(value, min_value, max_value,
+                                    step_increment, page_increment, 0)
+        widget.log_scale = log_scale
+        if mapping is None and logarithmic:
+            mapping = LogMapping(log_scale)
+        widget.mapping = mapping
+        widget.reset_value = widget.adjustment.props.value
+        return widget
+
+    def release(self, *widgets: DataWidget):
+        """Detaches widgets handed out by this pool and keeps them for reuse.
+Others are ignored."""
+        for widget in widgets:
+            key = self.__keys.pop(widget, None)
+            if key is None:
+                continue
+            widget.disconnect_changed()
+            parent = widget.get_parent()
+            if parent is not None:
+                parent.remove(widget)
+            free = self.__free.setdefault(key, [])
+            if len(free) < self.limit:
+                free.append(widget)
+
+    def release_all(self, container: Gtk.Container):
+        """Releases every widget from this pool inside container."""
+        widgets = []
+
+        def walk(widget: Gtk.Widget):
+            if widget in self.__keys:
+                widgets.append(widget)
+            elif isinstance(widget, Gtk.Container):
+                for child in widget.get_children():
+                    walk(child)
+
+        walk(container)
+        self.release(*widgets)
+
+    def clear(self):
+        """Drops every free widget."""
+        self.__free.clear()
+    # }}}
+
+
+# ### LAYOUT SPECS ### #
+
+
+# Widget types a layout spec can name, mapped to what constructs them.
+# Add to it for custom widgets.
+LAYOUT_TYPES = {
+    "Button": Button,
+    "CheckButton": CheckButton,
+    "ComboBox.new": ComboBox.new,
+    "ComboBox.new_dict": ComboBox.new_dict,
+    "ComboBox.new_lazy": ComboBox.new_lazy,
+    "Entry": Entry,
+    "Label": Gtk.Label.new,
+    "RadioButtons": RadioButtons,
+    "SpinScale.new": SpinScale.new,
+    "Table": Table,
+}
+
+_LAYOUT_DIRECTIONS = {
+    "down": Gtk.DirectionType.DOWN,
+    "up": Gtk.DirectionType.UP,
+    "left": Gtk.DirectionType.LEFT,
+    "right": Gtk.DirectionType.RIGHT,
+}
+_LAYOUT_ORIENTATIONS = {
+    "vertical": Gtk.Orientation.VERTICAL,
+    "horizontal": Gtk.Orientation.HORIZONTAL,
+}
+_PLACEMENT_KEYS = {"col_off", "row_off", "width", "height"}
+_GRID_KEYS = {"direction", "column", "row", "base_width", "base_height",
+              "column_spacing", "row_spacing",
+              "column_homogeneous", "row_homogeneous"}
+_layout_cache = {}
+# compiled layouts kept at once, oldest dropped first
+LAYOUT_CACHE = 64
+
+
+class _FunctionName(str):
+    """Placeholder for a function handed to Layout.build()"""
+
+
+class Layout():
+    # {{{
+    """A layout spec compiled by compile_layout(). Already validated, with
+redundant nesting flattened and grid positions worked out, so build() only
+has to construct and attach widgets.
+
+plan nodes are one of
+("widget", type name, args, kwargs, name)
+("box", orientation, spacing, [plans])
+("grid", Grid kwargs, [(plan, left, top, width, height)])"""
+    def __init__(self, plan: tuple):
+        self.plan = plan
+
+    def build(self, functions: {str: callable} = None
+              ) -> (Gtk.Widget, {str: Gtk.Widget}):
+        """Constructs the layout. Returns the root widget and the widgets
+that were given a name, the latter ready to make a Form from.
+functions fills in {"function": name} placeholders in args."""
+        names = {}
+        return self.__build(self.plan, functions or {}, names), names
+
+    def __build(self, plan: tuple, functions: {str: callable},
+                names: {str: Gtk.Widget}) -> Gtk.Widget:
+        kind = plan[0]
+        if kind == "widget":
+            _, type_name, args, kwargs, name = plan
+
+            def arg(value):
+                if type(value) is _FunctionName:
+                    return functions[value]
+                # each widget gets its own lists and dicts, so one mutating
+                # them can't change the cached plan or its siblings
+                if isinstance(value, (list, dict)):
+                    return copy.deepcopy(value)
+                return value
+
+            widget = LAYOUT_TYPES[type_name](
+                *(arg(x) for x in args),
+                **{key: arg(x) for key, x in kwargs.items()}
+            )
+            if name is not None:
+                widget.set_name(name)
+                names[name] = widget
+            return widget
+
+        elif kind == "box":
+            _, orientation, spacing, children = plan
+            box = Gtk.Box.new(orientation, spacing)
+            for child in children:
+                box.pack_start(self.__build(child, functions, names),
+                               True, True, 0)
+            return box
+
+        _, grid_kwargs, children = plan
+        grid = Grid(**grid_kwargs)
+        for child, left, top, width, height in children:
+            grid.attach(self.__build(child, functions, names),
+                        left, top, width, height)
+        return grid
+    # }}}
+
+
+def _compile_node(spec, path: str, orientation: Gtk.Orientation,
+                   vspacing: int, hspacing: int) -> tuple:
+    """Returns the plan for one spec node, or None if it's empty."""
+    if isinstance(spec, dict) and "box" in spec:
+        unknown = set(spec) - {"box", "orientation", "vspacing", "hspacing"}
+        if unknown - _PLACEMENT_KEYS:
+            raise ValueError(f"{path}: unknown keys {unknown}")
+        if "orientation" in spec:
+            if spec["orientation"] not in _LAYOUT_ORIENTATIONS:
+                raise ValueError(f"{path}.orientation: not one of "
+                                 f"{list(_LAYOUT_ORIENTATIONS)}")
+            orientation = _LAYOUT_ORIENTATIONS[spec["orientation"]]
+        return _compile_node(
+            spec["box"], path + ".box", orientation,
+            spec.get("vspacing", vspacing), spec.get("hspacing", hspacing)
+        )
+
+    if isinstance(spec, list):
+        # same rules as AutoBox, minus the boxes it would throw away
+        children = [
+            _compile_node(child, f"{path}[{n}]", 1 - orientation,
+                           vspacing, hspacing)
+            for n, child in enumerate(spec)
+        ]
+        children = [child for child in children if child is not None]
+        if not children:
+            return None
+        elif len(children) == 1:
+            return children[0]
+        return ("box", orientation,
+                vspacing if orientation == Gtk.Orientation.VERTICAL
+                else hspacing,
+                children)
+
+    if not isinstance(spec, dict):
+        raise ValueError(f"{path}: expected a list or dict, got {spec!r}")
+
+    if "grid" in spec:
+        return _compile_grid(spec, path, vspacing, hspacing)
+
+    unknown = set(spec) - {"widget", "args", "kwargs", "name"}
+    if unknown - _PLACEMENT_KEYS:
+        raise ValueError(f"{path}: unknown keys {unknown}")
+    if spec.get("widget") not in LAYOUT_TYPES:
+        raise ValueError(f"{path}.widget: {spec.get('widget')!r} is not "
+                         "in bszgw.LAYOUT_TYPES")
+    args = spec.get("args", [])
+    kwargs = spec.get("kwargs", {})
+    if not isinstance(args, list) or not isinstance(kwargs, dict):
+        raise ValueError(f"{path}: args must be a list, kwargs a dict")
+
+    def arg(value):
+        if isinstance(value, dict) and set(value) == {"function"}:
+            return _FunctionName(value["function"])
+        # copied, as the caller may change the spec after it's cached
+        return copy.deepcopy(value)
+
+    return ("widget", spec["widget"], tuple(arg(x) for x in args),
+            {key: arg(x) for key, x in kwargs.items()}, spec.get("name"))
+
+
+def _compile_grid(spec: dict, path: str, vspacing: int,
+                   hspacing: int) -> tuple:
+    unknown = set(spec) - {"grid"} - _GRID_KEYS - _PLACEMENT_KEYS
+    if unknown:
+        raise ValueError(f"{path}: unknown keys {unknown}")
+    if not isinstance(spec["grid"], list):
+        raise ValueError(f"{path}.grid: expected a list of children")
+    direction = _LAYOUT_DIRECTIONS.get(spec.get("direction", "down"))
+    if direction is None:
+        raise ValueError(f"{path}.direction: not one of "
+                         f"{list(_LAYOUT_DIRECTIONS)}")
+    column = spec.get("column", 0)
+    row = spec.get("row", 0)
+    base_width = spec.get("base_width", 1)
+    base_height = spec.get("base_height", 1)
+
+    # the same collision resolution as Grid.attach_all, done once here
+    occupancy = Occupancy()
+    resume = {}
+    children = []
+    for n, child in enumerate(spec["grid"]):
+        plan = _compile_node(child, f"{path}.grid[{n}]",
+                              Gtk.Orientation.VERTICAL, vspacing, hspacing)
+        if plan is None:
+            continue
+        placement = child if isinstance(child, dict) else {}
+        width = placement.get("width", base_width)
+        height = placement.get("height", base_height)
+        start = (column + placement.get("col_off", 0),
+                 row + placement.get("row_off", 0), width, height)
+        left, top = occupancy.find(direction, *resume.get(start, start[:2]),
+                                   width, height)
+        occupancy.add(n, left, top, width, height)
+        resume[start] = (left, top)
+        children.append((plan, left, top, width, height))
+
+    grid_kwargs = {key: spec[key] for key in (
+        "column_spacing", "row_spacing",
+        "column_homogeneous", "row_homogeneous"
+    ) if key in spec}
+    return ("grid", grid_kwargs, children)
+
+
+def compile_layout(spec, vspacing: int = 10, hspacing: int = 10) -> Layout:
+    # {{{
+    """Compiles a JSON-style layout spec into a Layout.
+Compiled layouts are cached by a hash of the spec, so compiling the same
+spec again skips validation and grid collision resolution.
+
+Nodes are:
+ - lists, nested the same way as AutoBox, vertical at the top
+ - {"box": node, "orientation": "horizontal", "vspacing": 5, "hspacing": 5}
+   to override the orientation or spacing of a list
+ - {"widget": "SpinScale.new", "args": [...], "kwargs": {...},
+    "name": "gain"} for any type in LAYOUT_TYPES. An arg or kwarg of
+   {"function": "name"} is filled in from the functions given to build()
+ - {"grid": [nodes], "direction": "down", "column": 0, "row": 0,
+    "base_width": 1, "base_height": 1} plus Grid's init kwargs,
+   attached like Grid.attach_all. Nodes inside it that are dicts may have
+   col_off, row_off, width and height like a GridChild."""
+    key = hashlib.sha1(
+        json.dumps([spec, vspacing, hspacing], sort_keys=True).encode()
+    ).hexdigest()
+    layout = _layout_cache.get(key)
+    if layout is None:
+        plan = _compile_node(spec, "layout", Gtk.Orientation.VERTICAL,
+                              vspacing, hspacing)
+        if plan is None:
+            raise ValueError("layout: empty")
+        layout = _layout_cache[key] = Layout(plan)
+        while len(_layout_cache) > LAYOUT_CACHE:
+            del _layout_cache[next(iter(_layout_cache))]
+    return layout
     # }}}